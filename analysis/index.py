@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+
+from array import array
+from bisect import bisect_left, bisect_right
+
+from parser.hours import Hours
+
+from analysis.totals import entry_key
+
+def records(timesheets):
+    """Given parsed timesheets, yield (key, label, ordinal, quarters) for
+    every day of hours, and (key, label, None, 0) for entries without any.
+    """
+    for timesheet in timesheets:
+        for entry in timesheet:
+            key = entry_key(entry)
+            if not entry.data:
+                yield (key, entry.label, None, 0, )
+            for ordinal, quarters in zip(entry.data.ordinals, entry.data.quarters):
+                yield (key, entry.label, ordinal, quarters, )
+
+class Index(object):
+    """Hours by project (or time code, see `analysis.totals.entry_key`),
+    built once so that totals over any range of days take two binary
+    searches instead of a scan of every entry.
+
+    For each key, `days` holds the sorted day ordinals with hours and `sums`
+    the cumulative quarter hours up to each of them, starting at 0.
+    """
+    def __init__(self, labels, daily):
+        self.labels = labels
+        self.days = {}
+        self.sums = {}
+        for key, hours in daily.items():
+            days = array("i", sorted(hours))
+            sums = array("q", [0])
+            total = 0
+            for day in days:
+                total += hours[day]
+                sums.append(total)
+            self.days[key] = days
+            self.sums[key] = sums
+
+    @classmethod
+    def build(cls, records):
+        """Given (key, label, ordinal, quarters) records, return an index.
+        Keys keep the label they first appear with, and the order they
+        first appear in. An ordinal of None adds the key without hours.
+        """
+        labels = {}
+        daily = {}
+        for key, label, ordinal, quarters in records:
+            if key not in labels:
+                labels[key] = label
+                daily[key] = {}
+            if ordinal is not None:
+                hours = daily[key]
+                hours[ordinal] = hours.get(ordinal, 0) + quarters
+        return cls(labels, daily)
+
+    @classmethod
+    def from_timesheets(cls, timesheets):
+        """Given parsed timesheets, return an index of their hours."""
+        return cls.build(records(timesheets))
+
+    @classmethod
+    def from_database(cls, database):
+        """Given a database (see storage.database), return an index of every
+        sheet stored in it.
+        """
+        return cls.build(database.query(
+            "SELECT entry_totals.key, entry_totals.label, hours.day, hours.quarters "
+            "FROM entry_totals LEFT JOIN hours ON hours.entry_id = entry_totals.id "
+            "ORDER BY entry_totals.id, hours.day"
+        ))
+
+    def __contains__(self, key):
+        return key in self.labels
+
+    def __iter__(self):
+        return iter(self.labels)
+
+    def __len__(self):
+        return len(self.labels)
+
+    def hours(self, key, start=None, end=None):
+        """Given a key, return its hours between two day ordinals, both
+        inclusive. Either bound can be None to leave the range open.
+        """
+        days = self.days[key]
+        sums = self.sums[key]
+        lo = 0 if start is None else bisect_left(days, start)
+        hi = len(days) if end is None else bisect_right(days, end)
+        if hi <= lo:
+            return Hours(0)
+        return Hours(sums[hi] - sums[lo])
+
+    def span(self, key):
+        """Given a key, return its first and last day ordinals with hours, or
+        None if it has none.
+        """
+        days = self.days[key]
+        if not days:
+            return None
+        return (days[0], days[-1], )
+
+    def totals(self, start=None, end=None):
+        """Return (key, label, hours) for every key, with hours between two
+        day ordinals as in `hours`.
+        """
+        return [
+            (key, label, self.hours(key, start, end), )
+            for key, label in self.labels.items()
+        ]
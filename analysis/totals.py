@@ -1,21 +1,32 @@
 #!/usr/bin/env python3
 
+from parser.hours import Hours
+
+# hours with these time codes are totalled by time code, not by project
+TIME_CODES = ("HOL", "OTU", "VAC", "OPL", )
+
+def entry_key(entry):
+    """Given a time entry, return the project or time code its hours are
+    totalled under.
+    """
+    if entry.time_code in TIME_CODES:
+        return entry.time_code
+    return entry.project
+
 def totals(timesheets):
     projects = {}
 
     for timesheet in timesheets:
         for entry in timesheet:
-            key = entry.project
-            if entry.time_code in ("HOL", "OTU", "VAC", "OPL", ):
-                key = entry.time_code
+            key = entry_key(entry)
 
             if key not in projects.keys():
                 projects[key] = {}
                 projects[key]["name"] = entry.label
                 projects[key]["hours"] = 0
 
-            for hours in entry.data.values():
-                projects[key]["hours"] += hours
+            if entry.data:
+                projects[key]["hours"] += entry.line_sum
 
     for project, data in projects.items():
         print(f"{project:20} {data['name']:100} {data['hours']}")
@@ -25,8 +36,31 @@ def total_ocps2020(timesheets):
     for timesheet in timesheets:
         for entry in timesheet:
             if entry.project == "20032.001.20.005":
-                for date, hours in entry.data.items():
-                    total += hours
+                if entry.data:
+                    total += entry.line_sum
                 break
     print(f"{total} hours spent on OCPS 2020")
 
+def query_totals(database):
+    """Like `totals`, but over every sheet in a database (see
+    storage.database).
+    """
+    rows = database.query(
+        "SELECT key, label, MIN(id), SUM(quarters) FROM entry_totals "
+        "GROUP BY key ORDER BY MIN(id)"
+    )
+    for project, name, _, quarters in rows:
+        hours = 0 if quarters is None else Hours(quarters)
+        # entries whose project or label rows were never matched have none
+        print(f"{project or '':20} {name or '':100} {hours}")
+
+def query_total_ocps2020(database):
+    """Like `total_ocps2020`, but over every sheet in a database."""
+    rows = database.query(
+        "SELECT SUM(quarters) FROM entry_totals WHERE id IN "
+        "(SELECT MIN(id) FROM entries WHERE project = ? GROUP BY sheet_id)",
+        ("20032.001.20.005", ),
+    )
+    quarters = rows[0][0]
+    total = 0 if quarters is None else Hours(quarters)
+    print(f"{total} hours spent on OCPS 2020")
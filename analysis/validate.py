@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+
+from parser.hours import Hours
+
+from report import diagnostics
+
+def header_total(sheet):
+    """Given a sheet, return the total hours stated in its header, or None
+    if it was not captured.
+    """
+    try:
+        return Hours.parse(sheet.info["total_timesheet"])
+    except (KeyError, ValueError):
+        return None
+
+def check_sheet(sheet):
+    """Given a sheet, compare the sum of all its hours to the total in its
+    header. Returns True or False, or None if there is no total to compare
+    against.
+    """
+    should_be = header_total(sheet)
+    if should_be is None:
+        return None
+
+    value = sum((entry.line_sum for entry in sheet), Hours(0))
+    if value == should_be:
+        return True
+
+    diagnostics.warn(
+        "sum does not match total",
+        daterange=sheet.info.get("daterange"),
+        field="total timesheet",
+        expected=str(should_be),
+        actual=str(value),
+    )
+    return False
+
+def check_entries(sheet):
+    """Given a sheet, compare the hours of each entry to the week and line
+    totals stated on the timesheet. Returns the number of mismatches.
+    """
+    mismatches = 0
+    daterange = sheet.info.get("daterange")
+
+    for entry in sheet:
+        for reference_date, should_be, value in entry.week_totals:
+            if value != should_be:
+                mismatches += 1
+                diagnostics.warn(
+                    "sum does not match total",
+                    daterange=daterange,
+                    field="total week hours",
+                    expected=str(should_be),
+                    actual=str(value),
+                )
+
+        if entry.line_total is not None:
+            value = entry.line_sum
+            if value != entry.line_total:
+                mismatches += 1
+                diagnostics.warn(
+                    "sum does not match total",
+                    daterange=daterange,
+                    field="total line hours",
+                    expected=str(entry.line_total),
+                    actual=str(value),
+                )
+
+    return mismatches
+
+def validate(sheet):
+    """Main routine. Given a sheet, check its hours against the totals
+    stated on the timesheet, recording a warning for each mismatch.
+
+    The sheet total is checked first. Only if it does not match (or was not
+    captured) are the week and line totals of each entry checked, to narrow
+    down the mismatch. Returns True if the sheet is consistent.
+    """
+    checked = check_sheet(sheet)
+    if checked:
+        return True
+    mismatches = check_entries(sheet)
+    return checked is None and mismatches == 0
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+
+import argparse
+import re
+import time
+
+from parser.timesheet import ROW_KINDS, classify
+
+from benchmark.synthetic import generate
+
+# The patterns compiled one at a time, as parser.timesheet used to test them
+CHAIN = [(kind, re.compile(pattern)) for kind, pattern in ROW_KINDS]
+
+def classify_chain(text):
+    """Given the text of a row, return its kind by trying each pattern in
+    turn.
+    """
+    for kind, pattern in CHAIN:
+        if pattern.match(text):
+            return kind
+    return "label"
+
+def texts(files=10, entries=20, pages=2):
+    """Return the text of every body row of some synthetic timesheets."""
+    texts = []
+    for number in range(files):
+        _, expected = generate(entries=entries, pages=pages, seed=number)
+        texts.extend(row[2] for row in expected if len(row) > 2)
+    return texts
+
+def measure(function, texts, repeat):
+    """Time a classifier over a list of texts, taking the best of several
+    runs.
+    """
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for text in texts:
+            function(text)
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+def main(files=10, entries=20, pages=2, repeat=5):
+    rows = texts(files=files, entries=entries, pages=pages)
+    print(f"classifying {len(rows)} rows")
+
+    mismatched = [text for text in rows if classify(text) != classify_chain(text)]
+    for text in mismatched:
+        print(f"mismatched kind: {text!r}")
+
+    print(f"{'classifier':20} {'time':>11} {'rate':>16}")
+    for name, function in (("chain", classify_chain), ("alternation", classify), ):
+        elapsed = measure(function, rows, repeat)
+        print(f"{name:20} {elapsed:10.4f}s {len(rows) / elapsed:>14,.0f}/s")
+
+    return len(mismatched)
+
+if __name__ == "__main__":
+    argparser = argparse.ArgumentParser(
+        description="Benchmark row classification over synthetic timesheets.",
+    )
+    argparser.add_argument("--files", type=int, default=10, help="number of timesheets")
+    argparser.add_argument("--entries", type=int, default=20, help="time entries per timesheet")
+    argparser.add_argument("--pages", type=int, default=2, help="pages per timesheet")
+    argparser.add_argument("--repeat", type=int, default=5, help="runs per classifier, best is reported")
+    args = argparser.parse_args()
+
+    mismatched = main(
+        files=args.files,
+        entries=args.entries,
+        pages=args.pages,
+        repeat=args.repeat,
+    )
+    raise SystemExit(1 if mismatched else 0)
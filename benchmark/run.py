@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+
+import argparse
+import csv
+import contextlib
+import io
+import pathlib
+import tempfile
+import time
+import tracemalloc
+
+from parser.xml import parse as parse_xml
+from parser.xml import iter_rows as iter_xml_rows
+from parser.timesheet import parse as parse_timesheet
+from parser.timesheet import parse_rows as parse_timesheet_rows
+
+from exporter.long_csv import export
+
+from analysis.totals import totals
+from analysis.validate import validate
+from analysis.index import Index
+
+from benchmark.synthetic import generate_files
+
+def stage_xml(filenames, directory, engine="sax"):
+    """Run parser.xml over every synthetic XML file. Returns the number of
+    rows written.
+    """
+    rows = 0
+    for xml_filename, csv_filename in filenames:
+        out_filename = directory.joinpath(f"{csv_filename.name}.{engine}")
+        parse_xml(xml_filename, out_filename, engine=engine)
+        with open(out_filename, "r", newline="") as f:
+            rows += sum(1 for _ in csv.reader(f))
+    return rows
+
+def stage_xml_expat(filenames, directory):
+    return stage_xml(filenames, directory, engine="expat")
+
+def stage_timesheet(filenames, directory):
+    """Run parser.timesheet over every synthetic CSV file. Returns the time
+    entries.
+    """
+    return [parse_timesheet(csv_filename) for _, csv_filename in filenames]
+
+def stage_stream(filenames, directory):
+    """Stream rows from every synthetic XML file straight into
+    parser.timesheet. Returns the time entries.
+    """
+    return [parse_timesheet_rows(iter_xml_rows(xml_filename)) for xml_filename, _ in filenames]
+
+def stage_export(timesheets, directory):
+    """Run exporter.long_csv over the time entries. Returns the number of
+    rows written.
+    """
+    export(directory.joinpath("export.csv"), timesheets)
+    return sum(len(entry.data) for timesheet in timesheets for entry in timesheet)
+
+def stage_totals(timesheets, directory):
+    """Run analysis.totals over the time entries, discarding its output.
+    Returns the number of hours aggregated.
+    """
+    with contextlib.redirect_stdout(io.StringIO()):
+        totals(timesheets)
+    return sum(len(entry.data) for timesheet in timesheets for entry in timesheet)
+
+def stage_index(timesheets, directory):
+    """Build an analysis.index over the time entries and total every key
+    over each week. Returns the number of queries.
+    """
+    index = Index.from_timesheets(timesheets)
+    queries = 0
+    for key in index:
+        span = index.span(key)
+        if span is None:
+            continue
+        for start in range(span[0], span[1] + 1, 7):
+            index.hours(key, start, start + 6)
+            queries += 1
+    return queries
+
+def stage_validate(timesheets, directory):
+    """Run analysis.validate over the time entries. Returns the number of
+    sheets that failed.
+    """
+    return sum(1 for timesheet in timesheets if not validate(timesheet))
+
+def measure(function, argument, directory, repeat, memory):
+    """Time a stage, taking the best of several runs. If `memory` is set,
+    the stage is run once more under tracemalloc to find its peak memory.
+    """
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function(argument, directory)
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+
+    peak = None
+    if memory:
+        tracemalloc.start()
+        function(argument, directory)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    return result, best, peak
+
+def check(filenames, directory):
+    """Compare the output of both parser.xml engines to the rows the
+    generator expected. Returns the number of mismatched files.
+    """
+    mismatched = 0
+    for xml_filename, csv_filename in filenames:
+        with open(csv_filename, "r") as f:
+            expected = f.read()
+        for engine in ("sax", "expat", ):
+            out_filename = directory.joinpath(f"{csv_filename.name}.{engine}")
+            with open(out_filename, "r") as f:
+                if f.read() != expected:
+                    print(f"mismatched rows ({engine}): '{xml_filename}'")
+                    mismatched += 1
+    return mismatched
+
+def report(stage, count, unit, elapsed, peak):
+    rate = count / elapsed if elapsed else float("inf")
+    memory = "-" if peak is None else f"{peak / 1024 / 1024:.2f} MiB"
+    print(f"{stage:20} {count:>10} {unit:8} {elapsed:10.4f}s {rate:>14,.0f}/s {memory:>12}")
+
+def main(files=10, entries=20, pages=2, repeat=3, memory=True, directory=None):
+    with tempfile.TemporaryDirectory() as tmp:
+        directory = pathlib.Path(directory or tmp)
+        directory.mkdir(parents=True, exist_ok=True)
+
+        print(f"generating {files} files ({entries} entries, {pages} pages each)")
+        filenames = generate_files(directory, files=files, entries=entries, pages=pages)
+
+        print(f"{'stage':20} {'count':>10} {'unit':8} {'time':>11} {'rate':>16} {'peak memory':>12}")
+
+        rows, elapsed, peak = measure(stage_xml, filenames, directory, repeat, memory)
+        report("parser.xml", rows, "rows", elapsed, peak)
+
+        rows, elapsed, peak = measure(stage_xml_expat, filenames, directory, repeat, memory)
+        report("parser.xml (expat)", rows, "rows", elapsed, peak)
+
+        timesheets, elapsed, peak = measure(stage_timesheet, filenames, directory, repeat, memory)
+        report("parser.timesheet", rows, "rows", elapsed, peak)
+
+        _, elapsed, peak = measure(stage_stream, filenames, directory, repeat, memory)
+        report("xml -> timesheet", rows, "rows", elapsed, peak)
+
+        count, elapsed, peak = measure(stage_export, timesheets, directory, repeat, memory)
+        report("exporter.long_csv", count, "rows", elapsed, peak)
+
+        count, elapsed, peak = measure(stage_totals, timesheets, directory, repeat, memory)
+        report("analysis.totals", count, "hours", elapsed, peak)
+
+        count, elapsed, peak = measure(stage_index, timesheets, directory, repeat, memory)
+        report("analysis.index", count, "queries", elapsed, peak)
+
+        failed, elapsed, peak = measure(stage_validate, timesheets, directory, repeat, memory)
+        report("analysis.validate", len(timesheets), "sheets", elapsed, peak)
+        if failed:
+            print(f"{failed} sheets failed validation")
+
+        return check(filenames, directory) + failed
+
+if __name__ == "__main__":
+    argparser = argparse.ArgumentParser(
+        description="Benchmark the parsing stages over synthetic timesheets.",
+    )
+    argparser.add_argument("--files", type=int, default=10, help="number of timesheets")
+    argparser.add_argument("--entries", type=int, default=20, help="time entries per timesheet")
+    argparser.add_argument("--pages", type=int, default=2, help="pages per timesheet")
+    argparser.add_argument("--repeat", type=int, default=3, help="runs per stage, best is reported")
+    argparser.add_argument(
+        "--no-memory",
+        action="store_true",
+        help="skip measuring peak memory with tracemalloc",
+    )
+    argparser.add_argument(
+        "--directory",
+        type=pathlib.Path,
+        help="keep generated files in this directory",
+    )
+    args = argparser.parse_args()
+
+    mismatched = main(
+        files=args.files,
+        entries=args.entries,
+        pages=args.pages,
+        repeat=args.repeat,
+        memory=not args.no_memory,
+        directory=args.directory,
+    )
+    raise SystemExit(1 if mismatched else 0)
+
@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+
+import datetime
+import csv
+import random
+from xml.sax.saxutils import escape
+
+# Page geometry and font size of the synthetic layout
+PAGE_BBOX = "0.000,0.000,792.000,612.000"
+CHAR_WIDTH = 3.0
+CHAR_HEIGHT = 6.0
+
+# Lowest and highest y coordinates of body rows. Rows must stay clear of
+# header and footer rows, which are identified by exact y coordinates.
+BODY_BOTTOM = 40
+BODY_TOP = {True: 390, False: 470, }
+
+# Range of two-week sheets, starting on a Monday
+FIRST_DATE = datetime.date(2018, 1, 1)
+SHEETS = 130
+
+DAY_COLUMNS = (572, 597, 622, 647, 672, 697, 722, )
+WEEK_TOTAL_COLUMN = 751
+DAY_LABELS = ("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun", )
+
+# Column of the hours grid that each x coordinate falls in
+COLUMNS = {x: column for column, x in enumerate(DAY_COLUMNS + (WEEK_TOTAL_COLUMN, ))}
+
+# Header boxes that TimeSheetHandler passes along as rows, by location
+FIELDS = {
+    (335, 504): "daterange",
+    (333, 504): "daterange",
+    (751, 481): "total_timesheet",
+    (751, 466): "standard_hours",
+    (751, 452): "total_billable",
+    (751, 437): "percent_billability",
+}
+
+PROJECTS = (
+    ("20032.001.20.005", "Survey design"),
+    ("20110.002.10.001", "Data management"),
+    ("20207.001.30.002", "Analytics support"),
+    ("19001.001.01.001", "General overhead"),
+    ("21005.003.20.004", "Reporting"),
+)
+
+def format_date(date):
+    return date.strftime("%d %b, %Y")
+
+def format_hours(quarters):
+    return f"{quarters // 4}.{(quarters % 4) * 25:02d}"
+
+def header_boxes(first_page, daterange, total):
+    """Return the header and column label boxes of a page, positioned where
+    TimeSheetHandler expects them.
+    """
+    if not first_page:
+        return [
+            (333, 524, "Timesheet\n[109015] Ricottone, Dominic"),
+            (333, 504, daterange),
+            (20, 479, "ID"),
+            (40, 479, "Time Code"),
+            (120, 479, "Project"),
+            (200, 479, "TimeType"),
+            (754, 479, "Total"),
+        ] + [(x, 479, label) for x, label in zip(DAY_COLUMNS, DAY_LABELS)]
+
+    return [
+        (335, 524, "Timesheet\n[109015] Ricottone, Dominic"),
+        (335, 504, daterange),
+        (20, 481, "Location:"),
+        (93, 481, "[E01] Fors Marsh Group"),
+        (20, 466, "Department:"),
+        (93, 466, "[3200] Advanced Analytics"),
+        (20, 452, "Employee Type:"),
+        (93, 452, "[1] Annual Salary"),
+        (20, 437, "Location (Default"),
+        (93, 437, "[LOCAL] Location"),
+        (230, 481, "Function:"),
+        (304, 481, "[1] Full Time"),
+        (230, 466, "Exempt:"),
+        (304, 466, "Yes"),
+        (230, 452, "Status:"),
+        (304, 452, "Approved"),
+        (230, 437, "Doc.No."),
+        (304, 437, "1"),
+        (440, 481, "Post Status:"),
+        (513, 481, "Posted"),
+        (440, 466, "Validation:"),
+        (513, 466, "Passed"),
+        (440, 452, "Date/Time:"),
+        (513, 452, "01/20/2022 10:00"),
+        (651, 481, "Total Timesheet:"),
+        (751, 481, total),
+        (651, 466, "Standard Hours:"),
+        (751, 466, "80.00"),
+        (651, 452, "Total Billable:"),
+        (751, 452, total),
+        (651, 437, "Percent Billability:"),
+        (751, 437, "100.00"),
+        (20, 399, "ID"),
+        (40, 399, "Time Code"),
+        (120, 399, "Project"),
+        (200, 399, "TimeType"),
+        (754, 399, "Total"),
+    ] + [(x, 399, label) for x, label in zip(DAY_COLUMNS, DAY_LABELS)]
+
+def footer_boxes(pagenum, pagecount):
+    return [
+        (20, 27, "01/20/2022 10:00"),
+        (120, 27, "EST"),
+        (688, 27, f"Page {pagenum}"),
+        (732, 27, f"of {pagecount}"),
+    ]
+
+def entry_rows(index, start_date, rng):
+    """Return the body rows of one time entry, top to bottom, and its total
+    number of quarter hours.
+    """
+    project, label = PROJECTS[index % len(PROJECTS)]
+    rows = [[(20, str(index % 30)), (40, "ST"), (120, project), (200, "REG"), (220, label)]]
+
+    line_total = 0
+    for week in range(2):
+        week_start = start_date + datetime.timedelta(days=7*week)
+        row = [(330, "Week Beginning: " + format_date(week_start))]
+        week_total = 0
+        for x in DAY_COLUMNS[:5]:
+            quarters = rng.randrange(0, 33)
+            if quarters:
+                row.append((x, format_hours(quarters)))
+                week_total += quarters
+        row.append((WEEK_TOTAL_COLUMN, format_hours(week_total)))
+        rows.append(row)
+        line_total += week_total
+
+    rows.append([(330, f"Total Hours for line {index % 30}: {format_hours(line_total)}")])
+    return rows, line_total
+
+def generate(entries=10, pages=2, seed=0, start_date=FIRST_DATE):
+    """Generate the layout of a synthetic timesheet.
+
+    Returns a list of pages, each a list of (x, y, text) boxes in the order
+    that pdfminer would report them, and the rows that TimeSheetHandler is
+    expected to produce.
+    """
+    rng = random.Random(seed)
+    end_date = start_date + datetime.timedelta(days=13)
+    daterange = f"{format_date(start_date)} - {format_date(end_date)}"
+
+    blocks = []
+    sheet_total = 0
+    for index in range(1, entries+1):
+        rows, line_total = entry_rows(index, start_date, rng)
+        blocks.append(rows)
+        sheet_total += line_total
+
+    per_page = -(-entries // pages) if entries else 0
+    layout = []
+    expected = []
+    for pagenum in range(1, pages+1):
+        first_page = (pagenum == 1)
+        page_blocks = blocks[(pagenum-1)*per_page:pagenum*per_page]
+        body_rows = [row for block in page_blocks for row in block]
+
+        last_page = (pagenum == pages)
+        room = BODY_TOP[first_page] - BODY_BOTTOM
+        needed = len(body_rows) + (2 if last_page else 0)
+        if needed > room:
+            raise ValueError(f"too many entries ({len(page_blocks)}) for page {pagenum}")
+        pitch = min(10, room // max(needed, 1))
+
+        body = []
+        page_expected = []
+        y = BODY_TOP[first_page]
+        for row in body_rows:
+            for x, text in row:
+                body.append((x, y, text))
+                column = str(COLUMNS[x]) if x in COLUMNS else ""
+                page_expected.append([f"{x:.3f}", f"{y:.3f}", text, column, "", str(pagenum)])
+            y -= pitch
+
+        if last_page:
+            body.append((20, y, "Hours Distribution by Time Code"))
+            page_expected.append(["20.000", f"{y+5:.3f}"])
+            body.append((20, y-pitch, "ST"))
+
+        boxes = header_boxes(first_page, daterange, format_hours(sheet_total))
+        for x, y, text in boxes:
+            if (x, y) in FIELDS:
+                page_expected.append([f"{x:.3f}", f"{y:.3f}", text, "", FIELDS[(x, y)], str(pagenum)])
+        layout.append(boxes + body + footer_boxes(pagenum, pages))
+        page_expected.sort(key=lambda x: (-float(x[1]), float(x[0])))
+        expected.extend(page_expected)
+
+    return layout, expected
+
+def write_textbox(f, index, x, y, text):
+    lines = text.split("\n")
+    x1 = x + CHAR_WIDTH * max(len(line) for line in lines)
+    y1 = y + CHAR_HEIGHT * len(lines)
+    f.write(f'<textbox id="{index}" bbox="{x:.3f},{y:.3f},{x1:.3f},{y1:.3f}">\n')
+    for number, line in enumerate(lines):
+        line_y0 = y1 - CHAR_HEIGHT * (number+1)
+        line_x1 = x + CHAR_WIDTH * len(line)
+        f.write(f'<textline bbox="{x:.3f},{line_y0:.3f},{line_x1:.3f},{line_y0+CHAR_HEIGHT:.3f}">\n')
+        for offset, char in enumerate(line):
+            char_x0 = x + CHAR_WIDTH * offset
+            f.write(
+                f'<text font="Helvetica" '
+                f'bbox="{char_x0:.3f},{line_y0:.3f},{char_x0+CHAR_WIDTH:.3f},{line_y0+CHAR_HEIGHT:.3f}" '
+                f'colourspace="DeviceGray" ncolour="0" size="{CHAR_HEIGHT:.3f}">'
+                f'{escape(char)}</text>\n'
+            )
+        f.write("<text>\n</text>\n")
+        f.write("</textline>\n")
+    f.write("</textbox>\n")
+
+def write_xml(filename, layout):
+    """Write a layout in the format of the XML written by parser.pdf."""
+    with open(filename, "w") as f:
+        f.write("<pages>\n")
+        for pagenum, boxes in enumerate(layout, start=1):
+            f.write(f'<page id="{pagenum}" bbox="{PAGE_BBOX}" rotate="0">\n')
+            for index, (x, y, text) in enumerate(boxes):
+                write_textbox(f, index, x, y, text)
+            f.write('<figure name="Fm1" bbox="700.000,550.000,760.000,580.000">\n')
+            f.write('<text font="Helvetica" bbox="700.000,550.000,703.000,556.000" '
+                    'colourspace="DeviceGray" ncolour="0" size="6.000">F</text>\n')
+            f.write("</figure>\n")
+            f.write("</page>\n")
+        f.write("</pages>\n")
+
+def write_csv(filename, rows):
+    """Write rows in the format of the CSV written by parser.xml."""
+    with open(filename, "w", newline="") as f:
+        writer = csv.writer(f)
+        for row in rows:
+            writer.writerow(row)
+
+def generate_files(directory, files=1, entries=10, pages=2, seed=0):
+    """Write synthetic XML and CSV files into a directory. Returns a list of
+    (XML filename, CSV filename) pairs.
+    """
+    filenames = []
+    for number in range(files):
+        # the parser only recognizes weeks between 2018 and 2022
+        start_date = FIRST_DATE + datetime.timedelta(days=14*(number % SHEETS))
+        layout, expected = generate(
+            entries=entries,
+            pages=pages,
+            seed=seed+number,
+            start_date=start_date,
+        )
+        xml_filename = directory.joinpath(f"synthetic{number:04d}.xml")
+        csv_filename = directory.joinpath(f"synthetic{number:04d}.csv")
+        write_xml(xml_filename, layout)
+        write_csv(csv_filename, expected)
+        filenames.append((xml_filename, csv_filename, ))
+    return filenames
+
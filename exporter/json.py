@@ -9,7 +9,7 @@ def encode_dict(timesheets):
     ```
     {
       'PROJECT': {
-        datetime.datetime(DATE): decimal.Decimal(HOURS),
+        datetime.datetime(DATE): Hours(HOURS),
         ...
       },
       ...
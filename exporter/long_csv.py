@@ -2,15 +2,19 @@
 
 import csv
 
+from parser import dates
+
+from report import profile
+
 def handle_date(date):
-    return date.strftime("%m/%d/%Y")
+    return dates.format_date(date.toordinal())
 
 def encode_list(timesheets):
     """Given a list of timesheets, which themselves are lists of time entries,
     create a long list of data.
 
     ```
-    [ ['PROJECT', 'MM/DD/YYYY', decimal.Decimal(HOURS)],
+    [ ['PROJECT', 'MM/DD/YYYY', Hours(HOURS)],
       ...
     ]
     ```
@@ -32,8 +36,11 @@ def encode_list(timesheets):
 
 def export(filename, timesheets):
     """Main routine."""
-    with open(filename, "w", newline="") as f:
+    with profile.stage("export"), open(filename, "w", newline="") as f:
         writer = csv.writer(f)
+        rows = 0
         for row in encode_list(timesheets):
             writer.writerow(row)
+            rows += 1
+        profile.count("export", rows=rows, bytes_out=f.tell())
 
@@ -2,41 +2,507 @@
 
 import sys
 import pathlib
+import argparse
+from functools import partial
 from pprint import pprint
 
 from parser.xml import parse as parse_xml
-from parser.pdf import parse as parse_pdf
+from parser.xml import iter_rows as iter_xml_rows
 from parser.timesheet import parse as parse_timesheet
+from parser.timesheet import parse_rows as parse_timesheet_rows
+from parser import dates
 
 from exporter.long_csv import export
 
 from analysis.totals import totals, total_ocps2020
+from analysis.totals import query_totals, query_total_ocps2020
+from analysis.validate import validate
+from analysis.index import Index
 
-def main(filelist):
-    timesheets = []
+from storage.cache import Cache, DEFAULT_DIRECTORY, DEFAULT_SIZE
+from storage.manifest import Manifest
+from storage.database import Database, DEFAULT_DATABASE
 
-    print(f"processing {len(filelist)} files")
-    for filename in (filelist):
+from report import diagnostics, profile
+
+COMMANDS = ("run", "clear-cache", "totals", "query", )
+
+def process(
+    filename,
+    digest=None,
+    intermediates=False,
+    compact=False,
+    cache=None,
+    page_jobs=1,
+    xml_engine="sax",
+):
+    """Run the full pipeline over a single file and return its time entries.
+
+    XML and CSV files that were already extracted from a PDF are parsed
+    directly, skipping the earlier stages. XML files are read with
+    `xml_engine`, either 'sax' or 'expat'.
+
+    PDF files are fed straight into the parser by default. If
+    `intermediates` is set, the XML and CSV files are written alongside the
+    PDF and read back, which is useful for debugging. If `compact` is also
+    set, the XML file holds only textbox-level content. Otherwise, if a cache
+    is given, rows are looked up by the file's content hash (`digest`, or
+    computed if not given) before parsing. Pages are interpreted in
+    `page_jobs` worker processes.
+
+    Without intermediates or a cache, rows are streamed into the timesheet
+    parser a page at a time.
+    """
+    if filename.suffix == ".csv":
+        return parse_timesheet(filename)
+    if filename.suffix == ".xml":
+        return parse_timesheet_rows(iter_xml_rows(filename, engine=xml_engine))
+
+    # pdfminer is slow to import, so it is only loaded once a PDF needs to be
+    # parsed
+    from parser.pdf import parse as parse_pdf
+    from parser.layout import parse as parse_layout
+    from parser.layout import iter_rows as iter_layout_rows
+
+    if intermediates:
         xml_filename = filename.parent.joinpath(filename.name + ".xml")
         csv_filename = filename.parent.joinpath(filename.name + ".csv")
 
-        parse_pdf(filename, xml_filename)
-        parse_xml(xml_filename, csv_filename)
+        parse_pdf(filename, xml_filename, compact=compact)
+        parse_xml(xml_filename, csv_filename, engine=xml_engine)
+
+        return parse_timesheet(csv_filename)
+
+    if cache is None:
+        return parse_timesheet_rows(iter_layout_rows(filename, jobs=page_jobs))
+
+    # warnings raised while the rows are parsed are cached with them, and
+    # raised again on a hit
+    with profile.stage("cache"):
+        key = cache.key(filename, digest)
+        cached = cache.get(key)
+    if cached is None:
+        profile.count("cache", misses=1)
+        rows = parse_layout(filename, jobs=page_jobs)
+        with profile.stage("cache"):
+            cache.put(key, rows, diagnostics.collected())
+    else:
+        profile.count("cache", hits=1)
+        rows, records = cached
+        diagnostics.replay(records)
+    return parse_timesheet_rows(rows)
+
+def try_process(
+    filename,
+    digest=None,
+    intermediates=False,
+    compact=False,
+    cache=None,
+    page_jobs=1,
+    xml_engine="sax",
+    profiling=False,
+):
+    """Wrapper around `process` that returns an error message instead of
+    raising, so that one bad file does not abort a batch. The file's
+    warnings are returned as well, and its profile if `profiling` is set.
+    """
+    if profiling:
+        profile.begin(filename)
+    diagnostics.begin(filename)
+    try:
+        with profile.stage("file"):
+            entries = process(
+                filename,
+                digest=digest,
+                intermediates=intermediates,
+                compact=compact,
+                cache=cache,
+                page_jobs=page_jobs,
+                xml_engine=xml_engine,
+            )
+        return entries, None, diagnostics.end(), profile.end()
+    except Exception as e:
+        profile.count("file", failures=1)
+        return None, f"{type(e).__name__}: {e}", diagnostics.end(), profile.end()
+
+def main(
+    filelist,
+    jobs=1,
+    intermediates=False,
+    compact=False,
+    cache=None,
+    page_jobs=1,
+    xml_engine="sax",
+    manifest=None,
+    database=None,
+    profiling=False,
+):
+    """Main routine. Returns the warnings raised for every file and, if
+    `profiling` is set, a profile for every file and one for the batch as a
+    whole. If a database is given, every loaded sheet is stored in it.
+    """
+    timesheets = []
+    loaded = []
+    loaded_digests = []
+    records = []
+    profiles = []
+    worker = partial(
+        try_process,
+        intermediates=intermediates,
+        compact=compact,
+        cache=cache,
+        page_jobs=page_jobs,
+        xml_engine=xml_engine,
+        profiling=profiling,
+    )
+
+    # with a manifest, only new or changed files are hashed
+    if manifest is not None:
+        dropped = manifest.prune(filelist)
+        if dropped:
+            print(f"dropping {dropped} files no longer present")
+        digests = [manifest.digest(filename) for filename in filelist]
+    else:
+        digests = [None] * len(filelist)
+
+    print(f"processing {len(filelist)} files")
+    if jobs > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            results = list(executor.map(worker, filelist, digests))
+    else:
+        results = [worker(filename, digest) for filename, digest in zip(filelist, digests)]
+
+    for filename, digest, (entries, error, file_records, file_profile) in zip(filelist, digests, results):
+        if error is not None:
+            print(f"failed to process '{filename}': {error}")
+        else:
+            timesheets.append(entries)
+            loaded.append(filename)
+            loaded_digests.append(digest)
+        records.extend(file_records)
+        if file_profile is not None:
+            profiles.append(file_profile)
+
+    if profiling:
+        profile.begin("(batch)")
+
+    with profile.stage("validate"):
+        failed = 0
+        for filename, entries in zip(loaded, timesheets):
+            diagnostics.begin(filename)
+            if not validate(entries):
+                failed += 1
+            records.extend(diagnostics.end())
+    profile.count("validate", sheets=len(timesheets), failed=failed)
+
+    if database is not None:
+        with profile.stage("database"):
+            for filename, digest, entries in zip(loaded, loaded_digests, timesheets):
+                database.store(filename, entries, digest=digest)
+        profile.count("database", sheets=len(timesheets))
 
-        timesheets.append(parse_timesheet(csv_filename))
+    if cache is not None:
+        cache.evict()
+    if manifest is not None:
+        manifest.save()
 
     dest_filename = pathlib.Path("analysis/timesheets_sas.csv")
     export(dest_filename, timesheets)
 
     total_ocps2020(timesheets)
 
+    if profiling:
+        profiles.append(profile.end())
+    return records, profiles
+
+def capture_profile(
+    filename,
+    profiles,
+    intermediates=False,
+    compact=False,
+    xml_engine="sax",
+):
+    """Re-run the slowest file of a batch under cProfile, without the cache,
+    and write the statistics to a file. Files that failed are skipped, and
+    the warnings of the re-run are discarded, as they were already reported.
+    """
+    file_profiles = [
+        x for x in profiles
+        if x["filename"] != "(batch)"
+        and not x["stages"].get("file", {}).get("failures")
+    ]
+    if not file_profiles:
+        return
+    slowest = pathlib.Path(profile.slowest(file_profiles))
+
+    import cProfile
+    import pstats
+
+    print(f"capturing profile of '{slowest}'")
+    profiler = cProfile.Profile()
+    diagnostics.begin(slowest)
+    try:
+        profiler.runcall(
+            process,
+            slowest,
+            intermediates=intermediates,
+            compact=compact,
+            xml_engine=xml_engine,
+        )
+    finally:
+        diagnostics.end()
+    profiler.dump_stats(filename)
+    pstats.Stats(profiler).sort_stats("cumulative").print_stats(20)
+
+def clear_cache(cache):
+    removed = cache.clear()
+    print(f"removed {removed} cache entries")
+
+def print_totals(database):
+    """Print the hours of every project, and of OCPS 2020, across every sheet
+    in a database.
+    """
+    query_totals(database)
+    query_total_ocps2020(database)
+
+def query(database, keys=(), start=None, end=None):
+    """Print the hours of the given projects or time codes (or all of them)
+    between two day ordinals, across every sheet in a database. Returns the
+    number of keys not found.
+    """
+    index = Index.from_database(database)
+    missing = 0
+    for key in keys or index:
+        if key not in index:
+            print(f"no such project: '{key}'")
+            missing += 1
+            continue
+        label = index.labels[key]
+        print(f"{key or '':20} {label or '':100} {index.hours(key, start, end)}")
+    return missing
+
+def query_date(date):
+    """Helper function to parse a date like '2022-01-31' as a day ordinal."""
+    try:
+        return dates.parse(date, dates.QUERY_FORMAT)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"not a date: '{date}'")
+
 if __name__ == "__main__":
+    common_parser = argparse.ArgumentParser(add_help=False)
+    common_parser.add_argument(
+        "--cache-dir",
+        type=pathlib.Path,
+        default=DEFAULT_DIRECTORY,
+        help="directory of cached rows",
+    )
+
+    argparser = argparse.ArgumentParser()
+    subparsers = argparser.add_subparsers(dest="command")
+
+    run_parser = subparsers.add_parser(
+        "run",
+        parents=[common_parser],
+        help="process timesheets (default)",
+    )
+    run_parser.add_argument("files", nargs="*")
+    run_parser.add_argument(
+        "-j", "--jobs",
+        type=int,
+        default=1,
+        help="number of files to process in parallel",
+    )
+    run_parser.add_argument(
+        "--page-jobs",
+        type=int,
+        default=1,
+        help="number of processes to split each file's pages across",
+    )
+    run_parser.add_argument(
+        "--intermediates",
+        action="store_true",
+        help="write and re-read XML and CSV files next to each PDF",
+    )
+    run_parser.add_argument(
+        "--compact",
+        action="store_true",
+        help="write only textbox-level content into XML intermediates",
+    )
+    run_parser.add_argument(
+        "--xml-engine",
+        choices=("sax", "expat", ),
+        default="sax",
+        help="parser for XML files",
+    )
+    run_parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="parse every file, ignoring cached rows",
+    )
+    run_parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="skip hashing files that are unchanged since the last run",
+    )
+    run_parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="print timings and counters for every file and stage",
+    )
+    run_parser.add_argument(
+        "--profile-json",
+        type=pathlib.Path,
+        help="write timings and counters to a JSON file",
+    )
+    run_parser.add_argument(
+        "--cprofile",
+        type=pathlib.Path,
+        help="write cProfile statistics of the slowest file to a file",
+    )
+    run_parser.add_argument(
+        "--diagnostics",
+        type=pathlib.Path,
+        help="write warnings to a JSON file",
+    )
+    run_parser.add_argument(
+        "--database",
+        type=pathlib.Path,
+        help="store parsed timesheets in an SQLite file",
+    )
+    run_parser.add_argument(
+        "--cache-size",
+        type=int,
+        default=DEFAULT_SIZE // (1024 * 1024),
+        help="size limit of the cache, in MiB",
+    )
+
+    subparsers.add_parser(
+        "clear-cache",
+        parents=[common_parser],
+        help="remove all cached rows",
+    )
+
+    totals_parser = subparsers.add_parser(
+        "totals",
+        help="print hours by project from the database",
+    )
+    totals_parser.add_argument(
+        "--database",
+        type=pathlib.Path,
+        default=DEFAULT_DATABASE,
+        help="SQLite file written by `run --database`",
+    )
+
+    query_parser = subparsers.add_parser(
+        "query",
+        help="print hours by project between two dates from the database",
+    )
+    query_parser.add_argument(
+        "keys",
+        nargs="*",
+        metavar="PROJECT",
+        help="projects or time codes, all of them if none are given",
+    )
+    query_parser.add_argument(
+        "--from",
+        dest="start",
+        type=query_date,
+        help="first day, like 2022-01-31",
+    )
+    query_parser.add_argument(
+        "--to",
+        dest="end",
+        type=query_date,
+        help="last day, like 2022-01-31",
+    )
+    query_parser.add_argument(
+        "--database",
+        type=pathlib.Path,
+        default=DEFAULT_DATABASE,
+        help="SQLite file written by `run --database`",
+    )
+
+    # `run` is the default command
+    argv = sys.argv[1:]
+    if not argv or argv[0] not in COMMANDS + ("-h", "--help", ):
+        argv = ["run"] + argv
+    args = argparser.parse_args(argv)
+
+    if args.command == "clear-cache":
+        clear_cache(Cache(args.cache_dir))
+        sys.exit(0)
+
+    if args.command == "totals":
+        if not args.database.exists():
+            print(f"no such database: '{args.database}'")
+            sys.exit(1)
+        database = Database(args.database)
+        print_totals(database)
+        database.close()
+        sys.exit(0)
+
+    if args.command == "query":
+        if not args.database.exists():
+            print(f"no such database: '{args.database}'")
+            sys.exit(1)
+        database = Database(args.database)
+        missing = query(database, args.keys, args.start, args.end)
+        database.close()
+        sys.exit(1 if missing else 0)
+
+    cache = None
+    if not args.no_cache:
+        cache = Cache(args.cache_dir, args.cache_size * 1024 * 1024)
+
+    manifest = None
+    if args.incremental:
+        if cache is None:
+            print("--incremental requires the cache")
+            sys.exit(1)
+        manifest = Manifest(args.cache_dir.joinpath("manifest.json"))
+
     filelist = []
-    for filename in sys.argv[1:]:
+    for filename in args.files:
         filepath = pathlib.Path(filename)
         if filepath.exists():
             filelist.append(filepath)
         else:
             print(f"no such file: '{filename}'")
-    main(filelist)
+    database = None
+    if args.database:
+        database = Database(args.database)
+
+    profiling = args.profile or args.profile_json or args.cprofile
+    records, profiles = main(
+        filelist,
+        jobs=args.jobs,
+        intermediates=args.intermediates,
+        compact=args.compact,
+        cache=cache,
+        page_jobs=args.page_jobs,
+        xml_engine=args.xml_engine,
+        manifest=manifest,
+        database=database,
+        profiling=bool(profiling),
+    )
+    if database is not None:
+        database.close()
+
+    diagnostics.summarize(records)
+    if args.diagnostics:
+        diagnostics.dump(args.diagnostics, records)
+
+    if args.profile:
+        profile.summarize(profiles)
+    if args.profile_json:
+        profile.dump(args.profile_json, profiles)
+    if args.cprofile:
+        capture_profile(
+            args.cprofile,
+            profiles,
+            intermediates=args.intermediates,
+            compact=args.compact,
+            xml_engine=args.xml_engine,
+        )
 
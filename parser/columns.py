@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+
+from bisect import bisect_right
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# Columns of the hours grid: one per day of the week, then the week's total
+DAYS = 7
+TOTAL = DAYS
+
+# Centers of the columns, for pages whose headers cannot be used. See `notes`.
+DEFAULT_CENTERS = (572, 597, 622, 647, 672, 697, 722, 751, )
+
+# PDFs store the rendered location of a textbox, not the mathematically-ideal
+# location. Cells are allowed to fall this far from the center of a column,
+# or less if the columns are closer together than twice this.
+TOLERANCE = 8
+
+class Columns(object):
+    """Columns of the hours grid on a page.
+
+    Each column accepts cells within a band around its center: the
+    tolerance, narrowed to just under half the distance to the nearest
+    neighbouring column. Cells between bands, or outside of the grid, belong
+    to no column, so that they are reported rather than guessed at.
+
+    Bands are kept as a sorted list of edges, lower then upper for each
+    column, so a cell is inside a band if an odd number of edges are at or
+    below it.
+    """
+    def __init__(self, centers):
+        self.centers = tuple(centers)
+        self.edges = []
+        for index, center in enumerate(self.centers):
+            gaps = [
+                abs(center - other)
+                for other in self.centers[max(0, index-1):index+2]
+                if other != center
+            ]
+            width = min([TOLERANCE] + [(gap - 1) / 2 for gap in gaps])
+            # coordinates are compared as whole pixels, so the band runs up
+            # to (but not including) the pixel after its upper bound
+            self.edges.append(center - width)
+            self.edges.append(center + width + 1)
+
+    def classify(self, x):
+        """Given an x coordinate, return a column or None."""
+        index = bisect_right(self.edges, x)
+        if index % 2 == 0:
+            return None
+        return index // 2
+
+    def classify_all(self, xs):
+        """Given a list of x coordinates, return a list of columns (or None)
+        in one pass.
+        """
+        if numpy is None:
+            return [self.classify(x) for x in xs]
+
+        xs = numpy.asarray(xs, dtype=float)
+        indices = numpy.searchsorted(self.edges, xs, side="right")
+        return [
+            index // 2 if index % 2 else None
+            for index in indices.tolist()
+        ]
+
+DEFAULT_COLUMNS = Columns(DEFAULT_CENTERS)
+
+def from_headers(days, totals):
+    """Given the day and total label boxes of a page as (x, text) pairs,
+    return the page's columns. Of the total label boxes, the last is used.
+
+    A box can hold more than one label (e.g. 'Tue Wed'); the columns after
+    its first are placed at the default spacing. If the labels do not
+    account for exactly seven days, or there is no total label, the default
+    columns are returned.
+    """
+    if not totals:
+        return DEFAULT_COLUMNS
+
+    centers = []
+    for x, text in sorted(days):
+        for offset, _ in enumerate(text.split()):
+            if len(centers) == DAYS:
+                return DEFAULT_COLUMNS
+            if offset:
+                x += DEFAULT_CENTERS[len(centers)] - DEFAULT_CENTERS[len(centers)-1]
+            centers.append(x)
+
+    if len(centers) != DAYS:
+        return DEFAULT_COLUMNS
+    centers.append(totals[-1][0])
+    if any(a >= b for a, b in zip(centers, centers[1:])):
+        return DEFAULT_COLUMNS
+    return Columns(centers)
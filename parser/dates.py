@@ -0,0 +1,30 @@
+#!/usr/bin/env python3
+
+import datetime
+from functools import lru_cache
+
+# Dates are handled as day ordinals (see `datetime.date.toordinal`). A batch
+# of timesheets covers a few hundred distinct days, so parsing and formatting
+# are memoized. The bound keeps a decade of days.
+CACHE_SIZE = 4096
+
+TIMESHEET_FORMAT = "%d %b, %Y"
+EXPORT_FORMAT = "%m/%d/%Y"
+QUERY_FORMAT = "%Y-%m-%d"
+
+@lru_cache(maxsize=CACHE_SIZE)
+def parse(date, pattern=TIMESHEET_FORMAT):
+    """Given a string like '01 Jan, 2022', return its day ordinal."""
+    return datetime.datetime.strptime(date, pattern).toordinal()
+
+@lru_cache(maxsize=CACHE_SIZE)
+def to_datetime(ordinal):
+    """Given a day ordinal, return it as a `datetime.datetime` at midnight.
+    The same object is returned for repeated calls.
+    """
+    return datetime.datetime.fromordinal(ordinal)
+
+@lru_cache(maxsize=CACHE_SIZE)
+def format_date(ordinal, pattern=EXPORT_FORMAT):
+    """Given a day ordinal, return it as a string like '01/31/2022'."""
+    return datetime.date.fromordinal(ordinal).strftime(pattern)
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+
+from collections import namedtuple
+
+# What a header or footer box should contain. `expected` is a value, a tuple
+# of allowed values, or None to skip validation. `label` names the field in
+# warnings. If `capture` is set, the box's content is stored on the handler
+# under that name, and passed along as a row of that field. If `collect` is
+# set, the box's x coordinate and content are added to a list of that name,
+# kept for the current page only.
+FieldSpec = namedtuple(
+    "FieldSpec",
+    ("expected", "label", "capture", "collect", ),
+    defaults=(None, ),
+)
+
+def around(x):
+    """Given an x coordinate, return the range of coordinates that are
+    considered equal to it.
+
+    PDFs store the rendered location of a textbox, not the mathematically-
+    ideal location. The net effect is that, while you can rely on the y
+    dimension to identify a row, you cannot rely on the x dimension to
+    identify a column. My solution is to make equivalence a bit fuzzy, to the
+    effect of +/- 5 pixels.
+    """
+    return (x-5, x+5, )
+
+# Header and footer boxes of the first page of a timesheet, as (field, range
+# of x, y) tuples for the lower left corner of each box
+FIRST_PAGE_FIELDS = (
+    ("timesheet_label", around(335), 524, ),
+    ("timesheet_value", around(335), 504, ),
+    ("location_label", around(20), 481, ),
+    ("location_value", around(93), 481, ),
+    ("department_label", around(20), 466, ),
+    ("department_value", around(93), 466, ),
+    ("employee_type_label", around(20), 452, ),
+    ("employee_type_value", around(93), 452, ),
+    ("location_default_label", around(20), 437, ),
+    ("location_default_value", around(93), 437, ),
+    ("function_label", around(230), 481, ),
+    ("function_value", around(304), 481, ),
+    ("exempt_label", around(230), 466, ),
+    ("exempt_value", around(304), 466, ),
+    ("status_label", around(230), 452, ),
+    ("status_value", around(304), 452, ),
+    ("_doc_no_label", around(230), 437, ),
+    ("_doc_no_value", around(304), 437, ),
+    ("post_status_label", around(440), 481, ),
+    ("post_status_value", around(513), 481, ),
+    ("validation_label", around(440), 466, ),
+    ("validation_value", around(513), 466, ),
+    ("datetime_label", around(440), 452, ),
+    ("datetime_value", around(513), 452, ),
+    ("total_timesheet_label", around(651), 481, ),
+    ("total_timesheet_value", around(751), 481, ),
+    ("standard_hours_label", around(651), 466, ),
+    ("standard_hours_value", around(751), 466, ),
+    ("total_billable_label", around(651), 452, ),
+    ("total_billable_value", around(751), 452, ),
+    ("percent_billability_label", around(651), 437, ),
+    ("percent_billability_value", around(751), 437, ),
+    ("id_label", around(20), 399, ),
+    ("time_code_label", around(40), 399, ),
+    ("project_label", around(120), 399, ),
+    ("timetype_label", around(200), 399, ),
+    ("day_label", (370, 730, ), 399, ),
+    ("total_label", around(754), 399, ),
+    ("footer_datetime_value", around(20), 27, ),
+    ("footer_timezone_value", around(120), 27, ),
+    ("footer_pagenum_value", around(688), 27, ),
+    ("footer_pagecount_value", around(732), 27, ),
+)
+
+# Header and footer boxes of every following page
+CONTINUATION_PAGE_FIELDS = (
+    ("timesheet_label", around(333), 524, ),
+    ("timesheet_value", around(333), 504, ),
+    ("id_label", around(20), 479, ),
+    ("time_code_label", around(40), 479, ),
+    ("project_label", around(120), 479, ),
+    ("timetype_label", around(200), 479, ),
+    ("day_label", (370, 730, ), 479, ),
+    ("total_label", around(754), 479, ),
+    ("footer_datetime_value", around(20), 27, ),
+    ("footer_timezone_value", around(120), 27, ),
+    ("footer_pagenum_value", around(688), 27, ),
+    ("footer_pagecount_value", around(732), 27, ),
+)
+
+def build_index(fields):
+    """Given a table of fields, build a lookup of y coordinate to x
+    coordinate to field. Where fields overlap, the first one wins.
+    """
+    index = {}
+    for field, (x_min, x_max), y in fields:
+        row = index.setdefault(y, {})
+        for x in range(x_min, x_max+1):
+            row.setdefault(x, field)
+    return index
+
+FIELD_SPECS = {
+    "timesheet_label": FieldSpec("Timesheet\n[109015] Ricottone, Dominic", "timesheet label", None),
+    "timesheet_value": FieldSpec(None, "timesheet", "daterange"),
+    "location_label": FieldSpec("Location:", "location label", None),
+    "location_value": FieldSpec("[E01] Fors Marsh Group", "location", None),
+    "department_label": FieldSpec("Department:", "department label", None),
+    "department_value": FieldSpec(
+        ("[3200] Advanced Analytics", "[3230] Data Management", ),
+        "department",
+        None,
+    ),
+    "employee_type_label": FieldSpec("Employee Type:", "employee type label", None),
+    "employee_type_value": FieldSpec("[1] Annual Salary", "employee type", None),
+    "location_default_label": FieldSpec("Location (Default", "location default label", None),
+    "location_default_value": FieldSpec("[LOCAL] Location", "location default", None),
+    "function_label": FieldSpec("Function:", "function label", None),
+    "function_value": FieldSpec("[1] Full Time", "function", None),
+    "exempt_label": FieldSpec("Exempt:", "exempt label", None),
+    "exempt_value": FieldSpec("Yes", "exempt", None),
+    "status_label": FieldSpec("Status:", "status label", None),
+    "status_value": FieldSpec(
+        ("Approved", "Closed", "On Hold [Draft]", ),
+        "status",
+        None,
+    ),
+    "post_status_label": FieldSpec("Post Status:", "post status label", None),
+    "post_status_value": FieldSpec(("Posted", "Not posted", ), "post status", None),
+    "validation_label": FieldSpec("Validation:", "validation label", None),
+    "validation_value": FieldSpec(("Passed", "Warnings", ), "validation", None),
+    "datetime_label": FieldSpec("Date/Time:", "datetime label", None),
+    "datetime_value": FieldSpec(None, "datetime", None),
+    "total_timesheet_label": FieldSpec("Total Timesheet:", "total timesheet label", None),
+    "total_timesheet_value": FieldSpec(None, "total timesheet", "total_timesheet"),
+    "standard_hours_label": FieldSpec("Standard Hours:", "standard hours label", None),
+    "standard_hours_value": FieldSpec(None, "standard hours", "standard_hours"),
+    "total_billable_label": FieldSpec("Total Billable:", "total billable label", None),
+    "total_billable_value": FieldSpec(None, "total billable", "total_billable"),
+    "percent_billability_label": FieldSpec("Percent Billability:", "percent billability label", None),
+    "percent_billability_value": FieldSpec(
+        None,
+        "percent billability",
+        "percent_billability",
+    ),
+    "id_label": FieldSpec("ID", "id label", None),
+    "time_code_label": FieldSpec("Time Code", "time code label", None),
+    "project_label": FieldSpec("Project", "project label", None),
+    "timetype_label": FieldSpec("TimeType", "timetype label", None),
+    "day_label": FieldSpec(
+        ("Mon", "Tue Wed", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun", ),
+        "day label",
+        None,
+        "day_labels",
+    ),
+    "total_label": FieldSpec(None, "total label", None, "total_labels"),
+    "_doc_no_label": FieldSpec("Doc.No.", "doc no label", None),
+    "_doc_no_value": FieldSpec("1", "doc no", None),
+    "footer_datetime_value": FieldSpec(None, "footer datetime", None),
+    "footer_timezone_value": FieldSpec(None, "footer timezone", None),
+    "footer_pagenum_value": FieldSpec(None, "footer pagenum", None),
+    "footer_pagecount_value": FieldSpec(None, "footer pagecount", None),
+}
+
+class Layout(object):
+    """Layout of a timesheet: where header and footer boxes sit on the first
+    and following pages, and what each of them should contain.
+
+    Supporting a new layout means building a new one of these from tables
+    like the ones above, and passing it to TimeSheetHandler.
+    """
+    def __init__(self, first_page_fields, continuation_page_fields, specs):
+        self.first_page_index = build_index(first_page_fields)
+        self.continuation_page_index = build_index(continuation_page_fields)
+        self.specs = specs
+
+DEFAULT_LAYOUT = Layout(FIRST_PAGE_FIELDS, CONTINUATION_PAGE_FIELDS, FIELD_SPECS)
+
+def lookup(index, x, y):
+    """Given a lookup and the integer location of a box, return the field
+    or None.
+    """
+    row = index.get(y)
+    if row is None:
+        return None
+    return row.get(x)
+
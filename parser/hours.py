@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+
+from functools import total_ordering
+from re import compile as re_compile
+
+# Hours as the timesheets format them. Only multiples of 0.25 are valid.
+HOURS_PATTERN = re_compile(r"(-?)([0-9]+)\.(00|25|50|75)")
+
+QUARTERS = {"00": 0, "25": 1, "50": 2, "75": 3}
+
+@total_ordering
+class Hours(object):
+    """A number of hours, stored as a whole number of quarter hours in
+    `quarters`.
+
+    Timesheets only record hours in multiples of 0.25, so sums are exact
+    without `decimal.Decimal`. Hours are not numbers: they can be added to
+    and subtracted from other hours (or 0, so that `sum` works), compared
+    with other hours, and formatted like the timesheets format them, e.g.
+    '8.25'. Use `quarters` or `float` for arithmetic.
+    """
+    __slots__ = ("quarters", )
+
+    def __init__(self, quarters=0):
+        if isinstance(quarters, bool) or not isinstance(quarters, int):
+            raise TypeError(f"quarter hours must be an integer, not {quarters!r}")
+        self.quarters = quarters
+
+    @classmethod
+    def parse(cls, hours):
+        """Given a string like '1.25', return hours. Raises ValueError if the
+        string is not a multiple of 0.25 with two decimal places.
+        """
+        match = HOURS_PATTERN.fullmatch(hours)
+        if match is None:
+            raise ValueError(f"not a quarter-hour value: {hours!r}")
+        sign, whole, fraction = match.groups()
+        quarters = int(whole) * 4 + QUARTERS[fraction]
+        return cls(-quarters if sign else quarters)
+
+    def __add__(self, other):
+        if isinstance(other, Hours):
+            return Hours(self.quarters + other.quarters)
+        if other == 0 and isinstance(other, int):
+            return self
+        return NotImplemented
+
+    __radd__ = __add__
+
+    def __sub__(self, other):
+        if isinstance(other, Hours):
+            return Hours(self.quarters - other.quarters)
+        if other == 0 and isinstance(other, int):
+            return self
+        return NotImplemented
+
+    def __rsub__(self, other):
+        if other == 0 and isinstance(other, int):
+            return -self
+        return NotImplemented
+
+    def __neg__(self):
+        return Hours(-self.quarters)
+
+    def __eq__(self, other):
+        if isinstance(other, Hours):
+            return self.quarters == other.quarters
+        return NotImplemented
+
+    def __lt__(self, other):
+        if isinstance(other, Hours):
+            return self.quarters < other.quarters
+        return NotImplemented
+
+    def __hash__(self):
+        return hash((Hours, self.quarters, ))
+
+    def __bool__(self):
+        return self.quarters != 0
+
+    def __float__(self):
+        return self.quarters / 4
+
+    def __str__(self):
+        whole, quarters = divmod(abs(self.quarters), 4)
+        sign = "-" if self.quarters < 0 else ""
+        return f"{sign}{whole}.{quarters * 25:02d}"
+
+    def __format__(self, format_spec):
+        return format(str(self), format_spec)
+
+    def __repr__(self):
+        return f"Hours('{self}')"
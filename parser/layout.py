@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from pdfminer.converter import PDFLayoutAnalyzer
+from pdfminer.pdfinterp import PDFResourceManager, PDFPageInterpreter
+from pdfminer.pdfpage import PDFPage
+from pdfminer.layout import LAParams, LTFigure, LTTextBox, LTTextGroup
+
+from parser.xml import TimeSheetHandler
+
+from report import profile
+
+def location(item):
+    """Format the lower left corner of a layout object like XMLConverter
+    formats a bounding box.
+    """
+    return f"{item.x0:.3f},{item.y0:.3f}"
+
+class TextBoxConverter(PDFLayoutAnalyzer):
+    """Layout analyzer that reports textboxes as SAX-like element events.
+
+    The events are the subset of the XML written by pdfminer's XMLConverter
+    that TimeSheetHandler pays attention to: pages, figures (without their
+    contents), and textboxes. The characters of a textbox are reported all
+    at once, and only the first two coordinates of a bounding box are kept.
+
+    Subclasses implement `startElement`, `characters`, and `endElement`.
+    """
+    def receive_layout(self, ltpage):
+        self.startElement("page", {"id": str(ltpage.pageid)})
+
+        for item in ltpage:
+            if isinstance(item, LTFigure):
+                self.startElement("figure", {})
+                self.endElement("figure")
+            elif isinstance(item, LTTextBox):
+                self.startElement("textbox", {"bbox": location(item)})
+                self.startElement("text", {})
+                self.characters(item.get_text())
+                self.endElement("text")
+                self.endElement("textbox")
+
+        # XMLConverter repeats every textbox, without content, in a trailing
+        # layout section
+        if ltpage.groups is not None:
+            for group in ltpage.groups:
+                self.receive_group(group)
+
+        self.endElement("page")
+
+    def receive_group(self, item):
+        if isinstance(item, LTTextBox):
+            self.startElement("textbox", {"bbox": location(item)})
+            self.endElement("textbox")
+        elif isinstance(item, LTTextGroup):
+            for child in item:
+                self.receive_group(child)
+
+class TimeSheetConverter(TextBoxConverter):
+    """Layout analyzer that feeds a TimeSheetHandler directly."""
+    def __init__(self, manager, handler, pageno=1, laparams=None):
+        TextBoxConverter.__init__(
+            self,
+            manager,
+            pageno=pageno,
+            laparams=laparams,
+        )
+        self.handler = handler
+
+    def startElement(self, name, attrs):
+        self.handler.startElement(name, attrs)
+
+    def characters(self, data):
+        self.handler.characters(data)
+
+    def endElement(self, name):
+        self.handler.endElement(name)
+
+class EventRecorder(TextBoxConverter):
+    """Layout analyzer that records element events, so that they can be
+    passed between processes and replayed into a TimeSheetHandler.
+    """
+    def __init__(self, manager, pageno=1, laparams=None):
+        TextBoxConverter.__init__(
+            self,
+            manager,
+            pageno=pageno,
+            laparams=laparams,
+        )
+        self.events = []
+
+    def startElement(self, name, attrs):
+        self.events.append(("startElement", name, attrs, ))
+
+    def characters(self, data):
+        self.events.append(("characters", data, ))
+
+    def endElement(self, name):
+        self.events.append(("endElement", name, ))
+
+def count_pages(filename):
+    """Count the pages of a PDF file without interpreting them."""
+    with open(filename, "rb") as f:
+        return sum(1 for _ in PDFPage.get_pages(f, caching=False))
+
+def extract_pages(filename, first, last):
+    """Interpret a contiguous range of pages, counting from zero, and return
+    the recorded element events.
+    """
+    manager = PDFResourceManager(caching=False)
+    converter = EventRecorder(manager, pageno=first+1, laparams=LAParams())
+    interpreter = PDFPageInterpreter(manager, converter)
+
+    with open(filename, "rb") as f:
+        pagenos = set(range(first, last))
+        for page in PDFPage.get_pages(f, pagenos=pagenos, caching=False):
+            interpreter.process_page(page)
+
+    return converter.events
+
+def parse_pages(filename, handler, jobs):
+    """Split the pages of a PDF file across worker processes, then replay
+    their events into a handler in page order. Yields after each range of
+    pages is replayed.
+
+    With a single job, or no pages to split, the pages are interpreted in
+    this process instead (see `interpret_pages`).
+    """
+    pagecount = count_pages(filename)
+    if jobs <= 1 or pagecount == 0:
+        yield from interpret_pages(filename, handler)
+        return
+
+    chunk = -(-pagecount // jobs)
+    firsts = list(range(0, pagecount, chunk))
+    lasts = [min(first+chunk, pagecount) for first in firsts]
+
+    with ProcessPoolExecutor(max_workers=max(1, len(firsts))) as executor:
+        chunks = executor.map(extract_pages, [filename]*len(firsts), firsts, lasts)
+        for events in chunks:
+            for event in events:
+                getattr(handler, event[0])(*event[1:])
+            yield
+
+def interpret_pages(filename, handler):
+    """Interpret the pages of a PDF file into a handler. Yields after each
+    page.
+    """
+    manager = PDFResourceManager(caching=False)
+    converter = TimeSheetConverter(manager, handler, laparams=LAParams())
+    interpreter = PDFPageInterpreter(manager, converter)
+
+    with open(filename, "rb") as f:
+        for page in PDFPage.get_pages(f, caching=False):
+            interpreter.process_page(page)
+            yield
+
+def iter_pages(filename, jobs=1):
+    """Reads a PDF file and yields the rows of each page as soon as the page
+    is interpreted.
+
+    If `jobs` is greater than 1, pages are interpreted in that many worker
+    processes, and are yielded as each worker's range of pages is replayed.
+    """
+    handler = TimeSheetHandler()
+    if jobs > 1:
+        steps = parse_pages(filename, handler, jobs)
+    else:
+        steps = interpret_pages(filename, handler)
+
+    rows = 0
+    while True:
+        with profile.stage("layout"):
+            done = next(steps, True) is True
+        for page in handler.pop_pages():
+            rows += len(page)
+            yield page
+        if done:
+            break
+
+    profile.count(
+        "layout",
+        bytes_in=os.path.getsize(filename),
+        pages=handler.pages,
+        textboxes=handler.textboxes,
+        rows=rows,
+    )
+
+def iter_rows(filename, jobs=1):
+    """Reads a PDF file and yields rows of data, a page at a time."""
+    for page in iter_pages(filename, jobs=jobs):
+        yield from page
+
+def parse(filename, jobs=1):
+    """Main routine. Reads a PDF file and returns rows of data.
+
+    If `jobs` is greater than 1, pages are interpreted in that many worker
+    processes.
+    """
+    return list(iter_rows(filename, jobs=jobs))
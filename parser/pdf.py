@@ -1,28 +1,102 @@
 #!/usr/bin/env python3
 
-from io import StringIO
+import os
 
 from pdfminer.converter import XMLConverter
 from pdfminer.pdfinterp import PDFResourceManager, PDFPageInterpreter
 from pdfminer.pdfpage import PDFPage
 from pdfminer.layout import LAParams
+from pdfminer.utils import enc
 
-def parse(filename_in, filename_out):
-    """Main routine. Reads a PDF file and writes an XML file."""
-    buffer = StringIO()
-    manager = PDFResourceManager(caching=False)
-    converter = XMLConverter(manager, buffer, laparams=LAParams(), codec=None)
-    interpreter = PDFPageInterpreter(manager, converter)
-
-    with open(filename_in, "rb") as f:
-        for page in PDFPage.get_pages(f, caching=False):
-            interpreter.process_page(page)
-
-    with open(filename_out, "w") as f:
-        first = True
-        for line in buffer.getvalue().splitlines():
-            if not first:
-                f.write(line+"\n")
-            first = False
-        f.write("</pages>\n")
+from parser.layout import TextBoxConverter
+
+from report import profile
+
+class XMLWriter(object):
+    """File-like object that passes converter output through to a file,
+    dropping the XML declaration on the first line.
+    """
+    mode = "w"
+
+    def __init__(self, f):
+        self.f = f
+        self.in_declaration = True
+
+    def write(self, data):
+        if self.in_declaration:
+            newline = data.find("\n")
+            if newline == -1:
+                return
+            data = data[newline+1:]
+            self.in_declaration = False
+        self.f.write(data)
+
+    def flush(self):
+        self.f.flush()
+
+class CompactXMLConverter(TextBoxConverter):
+    """Converter that writes one record per textbox, rather than one per
+    character. Contents of figures are skipped.
+
+    ```
+    <page id="1">
+    <textbox bbox="X0,Y0"><text>TEXT</text></textbox>
+    <figure></figure>
+    </page>
+    ```
+    """
+    def __init__(self, manager, outfp, pageno=1, laparams=None):
+        TextBoxConverter.__init__(
+            self,
+            manager,
+            pageno=pageno,
+            laparams=laparams,
+        )
+        self.outfp = outfp
+        self.outfp.write("<pages>\n")
+
+    def startElement(self, name, attrs):
+        self.outfp.write(f"<{name}")
+        for key, value in attrs.items():
+            self.outfp.write(f' {key}="{enc(value)}"')
+        self.outfp.write(">")
+
+    def characters(self, data):
+        self.outfp.write(enc(data))
+
+    def endElement(self, name):
+        self.outfp.write(f"</{name}>")
+        if name != "text":
+            self.outfp.write("\n")
+
+def parse(filename_in, filename_out, compact=False):
+    """Main routine. Reads a PDF file and writes an XML file.
+
+    Output is streamed to the XML file and flushed after every page. If
+    `compact` is set, only the textbox-level content that TimeSheetHandler
+    uses is written.
+    """
+    with profile.stage("pdf"), open(filename_out, "w") as f_out:
+        writer = XMLWriter(f_out)
+        manager = PDFResourceManager(caching=False)
+        if compact:
+            converter = CompactXMLConverter(manager, f_out, laparams=LAParams())
+        else:
+            converter = XMLConverter(manager, writer, laparams=LAParams(), codec=None)
+        interpreter = PDFPageInterpreter(manager, converter)
+
+        with open(filename_in, "rb") as f_in:
+            pages = 0
+            for page in PDFPage.get_pages(f_in, caching=False):
+                interpreter.process_page(page)
+                writer.flush()
+                pages += 1
+
+        f_out.write("</pages>\n")
+        profile.count(
+            "pdf",
+            bytes_in=os.path.getsize(filename_in),
+            bytes_out=f_out.tell(),
+            pages=pages,
+        )
 
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+
+class Row(object):
+    """A textbox on a page: the location of its lower left corner, its text,
+    the column of the hours grid that it falls in, and the page number. The
+    coordinates are parsed once, when the row is created.
+
+    A row without text (`text` is None) marks the end of a timesheet's time
+    entries. A row without a column either falls outside of the hours grid
+    or was never classified (see parser.columns). A row with a field is a
+    header or footer box that was captured (see parser.fields).
+    """
+    __slots__ = ("x", "y", "text", "column", "field", "page", )
+
+    def __init__(self, x, y, text=None, column=None, field=None, page=None):
+        self.x = x
+        self.y = y
+        self.text = text
+        self.column = column
+        self.field = field
+        self.page = page
+
+    def __eq__(self, other):
+        if not isinstance(other, Row):
+            return NotImplemented
+        return (
+            (self.x, self.y, self.text, self.column, self.field, self.page)
+            == (other.x, other.y, other.text, other.column, other.field, other.page)
+        )
+
+    def __repr__(self):
+        return (
+            f"Row({self.x!r}, {self.y!r}, {self.text!r}, {self.column!r}, "
+            f"{self.field!r}, {self.page!r})"
+        )
+
+    def as_list(self):
+        """Format a row for a CSV file. Trailing empty values are left out."""
+        values = [f"{self.x:.3f}", f"{self.y:.3f}"]
+        if self.text is None:
+            return values
+
+        values.append(self.text)
+        optional = [
+            "" if self.column is None else str(self.column),
+            self.field or "",
+            self.page or "",
+        ]
+        while optional and not optional[-1]:
+            optional.pop()
+        values.extend(optional)
+        return values
+
+    @classmethod
+    def from_list(cls, values):
+        """Parse a row from a CSV file."""
+        x, y = float(values[0]), float(values[1])
+        if len(values) < 3:
+            return cls(x, y)
+
+        column = int(values[3]) if len(values) > 3 and values[3] else None
+        field = values[4] if len(values) > 4 and values[4] else None
+        page = values[5] if len(values) > 5 and values[5] else None
+        return cls(x, y, values[2], column, field, page)
+
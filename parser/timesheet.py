@@ -1,117 +1,225 @@
 #!/usr/bin/env python3
 
-import datetime
-import decimal
 import csv
-import sys
+from array import array
+from collections.abc import MutableMapping
 from re import compile as re_compile
 
-ID_PATTERN = re_compile("[1-2]?[0-9]$")
-TIME_CODE_PATTERN = re_compile("(ST|VAC|HOL|OTU|OPL)")
-PROJECT_PATTERN = re_compile("[A-Z0-9]{5}\.[A-Z0-9]{3}\.[A-Z0-9]{2}\.[A-Z0-9]{3}")
-TIMETYPE_PATTERN = re_compile("[A-Z0-9.]{3,}")
-WEEK_BEGINNING_AND_WEEK_PATTERN = re_compile("Week Beginning: [0-9][0-9] [ADFJMNOS][aceopu][bcglnprtvy], 20[12][89012]")
-WEEK_BEGINNING_PATTERN = re_compile("Week Beginning:")
-WEEK_PATTERN = re_compile("[0-9][0-9] [ADFJMNOS][aceopu][bcglnprtvy], 20[12][89012]")
-HOURS_PATTERN = re_compile("[0-9][0-9]?\.(00|25|50|75)")
-TOTAL_HOURS_PATTERN = re_compile("Total Hours for line ")
-APPROVED_PATTERN = re_compile("Approved")
-NOTES_PATTERN = re_compile("Notes")
-
-def printf(string, *variables):
-    """Print to STDERR with formatting."""
-    sys.stderr.write(string.format(*variables))
-    sys.stderr.write("\n")
-
-def is_approximately(location, target):
-    """Tests if a location is close enough to a target to be considered equal.
-
-    PDFs store the rendered location of a textbox, not the mathematically-
-    ideal location. The net effect is that, while you can rely on the y
-    dimension to identify a row, you cannot rely on the x dimension to
-    identify a column. My solution is to make equivalence a bit fuzzy, to the
-    effect of +/- 5 pixels.
+from parser.row import Row
+from parser.columns import DEFAULT_COLUMNS, TOTAL
+from parser.hours import Hours
+from parser import dates
+
+from report import diagnostics, profile
+
+# Kinds of rows, as (kind, pattern) pairs. A row is of the first kind whose
+# pattern matches the start of its text, or else is a label. Patterns must
+# not contain capturing groups.
+ROW_KINDS = (
+    ("approved", r"Approved"),
+    ("week_beginning_and_week", r"Week Beginning: [0-9][0-9] [ADFJMNOS][aceopu][bcglnprtvy], 20[12][89012]"),
+    ("week_beginning", r"Week Beginning:"),
+    ("total_hours", r"Total Hours for line "),
+    ("week", r"[0-9][0-9] [ADFJMNOS][aceopu][bcglnprtvy], 20[12][89012]"),
+    ("hours", r"[0-9][0-9]?\.(?:00|25|50|75)"),
+    ("time_code", r"(?:ST|VAC|HOL|OTU|OPL)"),
+    ("project", r"[A-Z0-9]{5}\.[A-Z0-9]{3}\.[A-Z0-9]{2}\.[A-Z0-9]{3}"),
+    ("timetype", r"[A-Z0-9.]{3,}"),
+    ("id", r"[1-2]?[0-9]$"),
+    ("notes", r"Notes"),
+)
+
+# All kinds in one alternation. Alternatives are tried in order, so the
+# name of the matching group is the kind of the row.
+ROW_PATTERN = re_compile("|".join(f"(?P<{kind}>{pattern})" for kind, pattern in ROW_KINDS))
+
+def classify(text):
+    """Given the text of a row, return its kind."""
+    match = ROW_PATTERN.match(text)
+    if match is None:
+        return "label"
+    return match.lastgroup
+
+class DailyHours(MutableMapping):
+    """Hours of a time entry by date, stored as parallel arrays of day
+    ordinals and quarter hours.
+
+    Reads like a dictionary of `datetime.datetime` to Hours, and only takes
+    Hours. An entry spans two weeks at most, so lookups are a linear search.
     """
-    return (target-8 <= location <= target+8)
+    __slots__ = ("ordinals", "quarters", )
+
+    def __init__(self):
+        self.ordinals = array("i")
+        self.quarters = array("i")
+
+    def replace(self, ordinal, hours):
+        """Given a day ordinal and hours, set hours into the day. Returns the
+        hours that were replaced.
+        """
+        if not isinstance(hours, Hours):
+            raise TypeError(f"expected Hours, not {hours!r}")
+        try:
+            index = self.ordinals.index(ordinal)
+        except ValueError:
+            self.ordinals.append(ordinal)
+            self.quarters.append(hours.quarters)
+            return Hours(0)
+        replaced = Hours(self.quarters[index])
+        self.quarters[index] = hours.quarters
+        return replaced
+
+    def __setitem__(self, date, hours):
+        self.replace(date.toordinal(), hours)
+
+    def __getitem__(self, date):
+        try:
+            index = self.ordinals.index(date.toordinal())
+        except ValueError:
+            raise KeyError(date) from None
+        return Hours(self.quarters[index])
+
+    def __delitem__(self, date):
+        try:
+            index = self.ordinals.index(date.toordinal())
+        except ValueError:
+            raise KeyError(date) from None
+        del self.ordinals[index]
+        del self.quarters[index]
+
+    def __iter__(self):
+        for ordinal in self.ordinals:
+            yield dates.to_datetime(ordinal)
+
+    def __len__(self):
+        return len(self.ordinals)
+
+    def __contains__(self, date):
+        return date.toordinal() in self.ordinals
+
+    def values(self):
+        return [Hours(quarters) for quarters in self.quarters]
+
+    def items(self):
+        return [
+            (dates.to_datetime(ordinal), Hours(quarters), )
+            for ordinal, quarters in zip(self.ordinals, self.quarters)
+        ]
+
+class EntryError(ValueError):
+    """Raised when a time entry cannot take a value. TimeSheet records it as
+    a warning, along with the page and date range of the row.
+    """
+    def __init__(self, message, field=None, actual=None):
+        ValueError.__init__(self, message)
+        self.message = message
+        self.field = field
+        self.actual = actual
 
 class TimeEntry(object):
+    __slots__ = (
+        "label",
+        "project",
+        "time_code",
+        "data",
+        "reference_date",
+        "in_notes",
+        "final",
+        "week_sum",
+        "line_sum",
+        "week_totals",
+        "line_total",
+    )
+
     def __init__(self):
         self.label = None
         self.project = None
         self.time_code = None
-        self.data = {}
+        self.data = DailyHours()
         self.reference_date = None
         self.in_notes = False
         self.final = False
 
-    def assert_equal(self, value, should_be):
-        if value != should_be:
-            printf("{0} is not {1}", value, should_be)
+        # running sums of the hours set into the current week and into the
+        # entry as a whole
+        self.week_sum = Hours(0)
+        self.line_sum = Hours(0)
+
+        # totals as stated on the timesheet, as (reference date, stated,
+        # sum) for each week, checked by analysis.validate
+        self.week_totals = []
+        self.line_total = None
 
     def set_hours(self, day_offset, hours):
         """Given a string like '1.25' and a day offset between 0 and 6, set
-        hours into a date.
+        hours into a date. Raises EntryError if the entry cannot take hours.
         """
         if self.final:
-            printf(
-                "hours ({0}) set after entry finalized",
-                hours,
-            )
-            return
+            raise EntryError("set after entry finalized", field="hours", actual=hours)
 
         if self.reference_date is None:
-            printf(
-                "hours ({0}) set before a reference date",
-                hours,
-            )
-            return
+            raise EntryError("set before a reference date", field="hours", actual=hours)
 
-        target = self.reference_date
-        if day_offset != 0:
-            target += datetime.timedelta(days=day_offset)
-        self.data[target] = decimal.Decimal(hours)
+        try:
+            value = Hours.parse(hours)
+        except ValueError:
+            raise EntryError("not a quarter-hour value", field="hours", actual=hours) from None
+
+        target = self.reference_date + day_offset
+        replaced = self.data.replace(target, value)
+        self.week_sum += value - replaced
+        self.line_sum += value - replaced
 
     def set_total_week_hours(self, total_hours):
-        """Given a string like '1.25', validate set hours for a week."""
+        """Given a string like '1.25', record the total hours for a week.
+        Raises EntryError if the entry cannot take a total.
+        """
         if self.final:
-            printf(
-                "total week hours ({0}) set after entry finalized",
-                total_hours,
+            raise EntryError(
+                "set after entry finalized",
+                field="total week hours",
+                actual=total_hours,
             )
-            return
 
         if self.reference_date is None:
-            printf(
-                "total week hours ({0}) set before a reference date",
-                total_hours,
+            raise EntryError(
+                "set before a reference date",
+                field="total week hours",
+                actual=total_hours,
             )
-            return
 
-        target = self.reference_date
-        sum_hours = decimal.Decimal(0)
-        for _ in range(7):
-            if target in self.data:
-                sum_hours += self.data[target]
-            target += datetime.timedelta(days=1)
+        try:
+            value = Hours.parse(total_hours)
+        except ValueError:
+            raise EntryError(
+                "not a quarter-hour value",
+                field="total week hours",
+                actual=total_hours,
+            ) from None
 
-        self.assert_equal(sum_hours, decimal.Decimal(total_hours))
+        self.week_totals.append((self.reference_date, value, self.week_sum, ))
 
         self.advance_reference_date()
 
     def set_total_line_hours(self, total_hours):
-        """Given a string like '1.25', validate set hours for a line entry."""
+        """Given a string like '1.25', record the total hours for a line
+        entry. Raises EntryError if the entry cannot take a total.
+        """
         if self.final:
-            printf(
-                "total line hours ({0}) set after entry finalized",
-                total_hours,
+            raise EntryError(
+                "set after entry finalized",
+                field="total line hours",
+                actual=total_hours,
             )
-            return
-
-        sum_hours = decimal.Decimal(0)
-        for date, hours in self.data.items():
-            sum_hours += hours
 
-        self.assert_equal(sum_hours, decimal.Decimal(total_hours))
+        try:
+            self.line_total = Hours.parse(total_hours)
+        except ValueError:
+            raise EntryError(
+                "not a quarter-hour value",
+                field="total line hours",
+                actual=total_hours,
+            ) from None
 
         self.mark_final()
 
@@ -120,10 +228,11 @@ class TimeEntry(object):
         self.reference_date = None
 
     def set_reference_date(self, date):
-        """Given a string like '01 Jan, 2022', set the reference date for
-        subsequent method calls.
+        """Given a string like '01 Jan, 2022', set the reference date (as a
+        day ordinal) for subsequent method calls, and start a new week.
         """
-        self.reference_date = datetime.datetime.strptime(date, "%d %b, %Y")
+        self.reference_date = dates.parse(date)
+        self.week_sum = Hours(0)
 
     def set_time_code(self, time_code):
         """Given 'ST', 'HOL', or 'VAC', set the time code."""
@@ -150,14 +259,35 @@ class TimeEntry(object):
         """Mark that no more ho9urs should be accepted."""
         self.final = True
 
+class Sheet(list):
+    """Time entries of a timesheet, along with the values captured from its
+    header and footer boxes (see parser.fields) in `info`.
+    """
+    def __init__(self, entries=(), info=None):
+        list.__init__(self, entries)
+        self.info = info if info is not None else {}
+
 class TimeSheet(object):
-    def __init__(self, data):
-        self.data = data
+    def __init__(self, rows):
+        """Given an iterable of rows, parse time entries until the end of
+        the time entries. Any remaining rows are consumed but not parsed, so
+        that a streamed document is read to its end.
+        """
         self.entries = []
-        for row in range(len(self.data)):
+        self.info = {}
+        self.rows = 0
+
+        # row being parsed, for locating warnings
+        self.row = None
+
+        rows = iter(rows)
+        for row in rows:
+            self.rows += 1
             rc = self.parse_row(row)
             if rc:
                 break
+        for row in rows:
+            self.rows += 1
 
     def set_hours(self, day, hours):
         """Given a string like '1.25' and a day offset between 0 and 6, set
@@ -165,17 +295,22 @@ class TimeSheet(object):
         """
         if " " in hours:
             two_hours = hours.split(" ", 1)
-            self.entries[-1].set_hours(day, two_hours[0])
-            self.entries[-1].set_hours(day+1, two_hours[1])
+            for offset, value in enumerate(two_hours):
+                try:
+                    self.entries[-1].set_hours(day+offset, value)
+                except EntryError as error:
+                    self.record_error(error)
         else:
             self.entries[-1].set_hours(day, hours)
 
     def set_total_week_hours(self, total_hours):
-        """Given a string like '1.25', validate set hours for a week."""
+        """Given a string like '1.25', record the total hours for a week."""
         self.entries[-1].set_total_week_hours(total_hours)
 
     def set_total_line_hours(self, total_hours):
-        """Given a string like '1.25', validate set hours for a line entry."""
+        """Given a string like '1.25', record the total hours for a line
+        entry.
+        """
         self.entries[-1].set_total_line_hours(total_hours)
 
     def advance_reference_date(self):
@@ -212,63 +347,87 @@ class TimeSheet(object):
         """
         self.entries[-1].mark_notes()
 
-    def parse_row(self, index):
-        """Parse a row of data and dispatch between time entry methods."""
-        if len(self.data[index])<3:
+    def warn(self, message, field=None, actual=None):
+        """Helper function to record a warning about the current row."""
+        diagnostics.warn(
+            message,
+            page=self.row.page,
+            daterange=self.info.get("daterange"),
+            field=field,
+            actual=actual,
+        )
+
+    def record_error(self, error):
+        """Helper function to record an EntryError as a warning."""
+        self.warn(error.message, field=error.field, actual=error.actual)
+
+    def parse_row(self, row):
+        """Parse a row of data and dispatch between time entry methods.
+        Values that a time entry cannot take are recorded as warnings.
+        """
+        if row.text is None:
             return True
+        if row.field is not None:
+            self.info[row.field] = row.text
+            return False
+
+        self.row = row
+        try:
+            self.dispatch_row(row)
+        except EntryError as error:
+            self.record_error(error)
+        return False
 
-        if APPROVED_PATTERN.match(self.data[index][2]):
-            pass
-        elif WEEK_BEGINNING_AND_WEEK_PATTERN.match(self.data[index][2]):
-            self.set_reference_date(self.data[index][2].split(": ", 1)[1])
-        elif WEEK_BEGINNING_PATTERN.match(self.data[index][2]):
-            self.advance_reference_date()
-        elif TOTAL_HOURS_PATTERN.match(self.data[index][2]):
-            self.set_total_line_hours(self.data[index][2].split(": ", 1)[1])
-        elif WEEK_PATTERN.match(self.data[index][2]):
-            self.set_reference_date(self.data[index][2])
-        elif HOURS_PATTERN.match(self.data[index][2]):
-            x = int(float(self.data[index][0]))
-            if is_approximately(x, 572):
-                self.set_hours(0, self.data[index][2])
-            elif is_approximately(x, 597):
-                self.set_hours(1, self.data[index][2])
-            elif is_approximately(x, 622):
-                self.set_hours(2, self.data[index][2])
-            elif is_approximately(x, 647):
-                self.set_hours(3, self.data[index][2])
-            elif is_approximately(x, 672):
-                self.set_hours(4, self.data[index][2])
-            elif is_approximately(x, 697):
-                self.set_hours(5, self.data[index][2])
-            elif is_approximately(x, 722):
-                self.set_hours(6, self.data[index][2])
-            elif is_approximately(x, 751):
-                self.set_total_week_hours(self.data[index][2])
+    def dispatch_row(self, row):
+        """Helper function to dispatch a row of data by its kind."""
+        text = row.text
+        kind = classify(text)
+
+        if kind == "label":
+            self.set_label(text)
+        elif kind == "hours":
+            column = row.column
+            if column is None:
+                column = DEFAULT_COLUMNS.classify(row.x)
+
+            if column is None:
+                self.warn("fell outside of the day columns", field="hours", actual=text)
+            elif column == TOTAL:
+                self.set_total_week_hours(text)
             else:
-                printf(
-                    "found hours ({0}) but they fell through all conditions",
-                    self.data[index][2],
-                )
-        elif TIME_CODE_PATTERN.match(self.data[index][2]):
-            self.set_time_code(self.data[index][2])
-        elif PROJECT_PATTERN.match(self.data[index][2]):
-            self.set_project(self.data[index][2])
-        elif TIMETYPE_PATTERN.match(self.data[index][2]):
-            pass
-        elif ID_PATTERN.match(self.data[index][2]):
+                self.set_hours(column, text)
+        elif kind == "week_beginning_and_week":
+            self.set_reference_date(text.split(": ", 1)[1])
+        elif kind == "week_beginning":
+            self.advance_reference_date()
+        elif kind == "total_hours":
+            self.set_total_line_hours(text.split(": ", 1)[1])
+        elif kind == "week":
+            self.set_reference_date(text)
+        elif kind == "time_code":
+            self.set_time_code(text)
+        elif kind == "project":
+            self.set_project(text)
+        elif kind == "id":
             self.entries.append(TimeEntry())
-        elif NOTES_PATTERN.match(self.data[index][2]):
+        elif kind == "notes":
             self.mark_notes()
-        else:
-            self.set_label(self.data[index][2])
+        # approved and timetype rows are skipped
 
-        return False
+def parse_rows(rows):
+    """Given rows of data, return the time entries as a Sheet.
+
+    Rows can be streamed from an earlier stage; the time spent producing
+    them then counts towards this stage as well.
+    """
+    with profile.stage("timesheet"):
+        timesheet = TimeSheet(rows)
+    profile.count("timesheet", rows=timesheet.rows, entries=len(timesheet.entries))
+    return Sheet(timesheet.entries, timesheet.info)
 
 def parse(filename):
+    """Main routine. Reads a CSV file and returns the time entries."""
     with open(filename, "r", newline="") as f:
         reader = csv.reader(f)
-        timesheet = TimeSheet([row for row in reader])
-        entries = timesheet.entries
-        return entries
+        return parse_rows(Row.from_list(row) for row in reader)
 
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+
+import json
+import sys
+
+class Diagnostics(object):
+    """Warnings raised while processing one file. Repeats of a warning are
+    counted rather than stored again.
+
+    ```
+    [
+      {
+        'filename': 'data/timesheet.pdf',
+        'daterange': '03 Jan, 2022 - 16 Jan, 2022',
+        'pages': ['1', '2'],
+        'field': 'department',
+        'message': 'unexpected value',
+        'expected': ['[3200] Advanced Analytics', '[3230] Data Management'],
+        'actual': '[3100] Research',
+        'count': 2,
+      },
+      ...
+    ]
+    ```
+    """
+    def __init__(self, filename):
+        self.filename = str(filename)
+        self.records = {}
+
+    def add(self, message, page=None, daterange=None, field=None, expected=None, actual=None):
+        key = (daterange, field, message, str(expected), actual, )
+        if key not in self.records.keys():
+            self.records[key] = {
+                "filename": self.filename,
+                "daterange": daterange,
+                "pages": [],
+                "field": field,
+                "message": message,
+                "expected": expected,
+                "actual": actual,
+                "count": 0,
+            }
+        record = self.records[key]
+        record["count"] += 1
+        if page is not None and page not in record["pages"]:
+            record["pages"].append(page)
+
+    def merge(self, record):
+        """Given a record from another run, add its warning as many times
+        as it was raised there.
+        """
+        key = (record["daterange"], record["field"], record["message"], str(record["expected"]), record["actual"], )
+        if key not in self.records.keys():
+            self.records[key] = dict(record, filename=self.filename, pages=[], count=0)
+        merged = self.records[key]
+        merged["count"] += record["count"]
+        for page in record["pages"]:
+            if page not in merged["pages"]:
+                merged["pages"].append(page)
+
+    def as_list(self):
+        return list(self.records.values())
+
+# Diagnostics of the file currently being processed, or None if warnings
+# should be printed as they are raised. Each worker process has its own.
+current = None
+
+def begin(filename):
+    """Start collecting warnings for a file."""
+    global current
+    current = Diagnostics(filename)
+
+def end():
+    """Stop collecting warnings for a file and return them as a list of
+    records.
+    """
+    global current
+    diagnostics = current
+    current = None
+    return diagnostics.as_list() if diagnostics is not None else []
+
+def collected():
+    """Return the warnings collected so far for the current file, as a list
+    of records.
+    """
+    return current.as_list() if current is not None else []
+
+def replay(records):
+    """Given records saved from an earlier run over the same file, raise
+    their warnings again.
+    """
+    for record in records:
+        if current is None:
+            sys.stderr.write(describe(record))
+            sys.stderr.write("\n")
+        else:
+            current.merge(record)
+
+def warn(message, page=None, daterange=None, field=None, expected=None, actual=None):
+    """Record a warning into the current file's diagnostics, or print it to
+    STDERR if warnings are not being collected.
+    """
+    if current is None:
+        sys.stderr.write(describe({
+            "daterange": daterange,
+            "pages": [page] if page is not None else [],
+            "field": field,
+            "message": message,
+            "expected": expected,
+            "actual": actual,
+        }))
+        sys.stderr.write("\n")
+    else:
+        current.add(
+            message,
+            page=page,
+            daterange=daterange,
+            field=field,
+            expected=expected,
+            actual=actual,
+        )
+
+def describe(record):
+    """Format a record as a single line."""
+    parts = []
+    if record.get("daterange"):
+        parts.append(record["daterange"])
+    if record.get("pages"):
+        parts.append("page " + ",".join(record["pages"]))
+    if record.get("field") is not None:
+        parts.append(record["field"])
+
+    detail = record["message"]
+    expected = record.get("expected")
+    if isinstance(expected, list):
+        expected = "one of " + ", ".join(repr(x) for x in expected)
+    elif expected is not None:
+        expected = repr(expected)
+    if expected is not None:
+        detail += f" (should be {expected}, is {record['actual']!r})"
+    elif record.get("actual") is not None:
+        detail += f" ({record['actual']!r})"
+    parts.append(detail)
+    return ": ".join(parts)
+
+def summarize(records):
+    """Given a list of records, print each distinct warning once to STDERR
+    with how many times and in how many files it was raised.
+    """
+    if not records:
+        return
+
+    totals = {}
+    for record in records:
+        key = (record["field"], record["message"], str(record["expected"]), record["actual"], )
+        if key not in totals.keys():
+            totals[key] = {"record": record, "count": 0, "files": set()}
+        totals[key]["count"] += record["count"]
+        totals[key]["files"].add(record["filename"])
+
+    count = sum(total["count"] for total in totals.values())
+    sys.stderr.write(f"{count} warnings ({len(totals)} distinct)\n")
+    for total in sorted(totals.values(), key=lambda x: -x["count"]):
+        record = total["record"]
+        line = describe({
+            "field": record["field"],
+            "message": record["message"],
+            "expected": record["expected"],
+            "actual": record["actual"],
+        })
+        sys.stderr.write(f"{total['count']:6} x {line} [{len(total['files'])} files]\n")
+
+def dump(filename, records):
+    """Write a list of records to a JSON file."""
+    with open(filename, "w") as f:
+        json.dump(records, f, indent=2)
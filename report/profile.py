@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+
+import json
+import time
+
+class Profile(object):
+    """Timings and counters for the stages of processing one file.
+
+    ```
+    {
+      'filename': 'data/timesheet.pdf',
+      'stages': {
+        'STAGE': {'time': SECONDS, 'COUNTER': N, ...},
+        ...
+      },
+    }
+    ```
+    """
+    def __init__(self, filename):
+        self.filename = str(filename)
+        self.stages = {}
+
+    def add(self, stage, **counters):
+        """Add counters (including time) into a stage."""
+        if stage not in self.stages.keys():
+            self.stages[stage] = {"time": 0.0}
+        for key, value in counters.items():
+            self.stages[stage][key] = self.stages[stage].get(key, 0) + value
+
+    def as_dict(self):
+        return {"filename": self.filename, "stages": self.stages}
+
+class Timer(object):
+    """Context manager that adds its wall time to a stage of the current
+    profile. Does nothing when profiling is disabled.
+    """
+    def __init__(self, stage):
+        self.stage = stage
+        self.start = None
+
+    def __enter__(self):
+        if current is not None:
+            self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        if current is not None and self.start is not None:
+            current.add(self.stage, time=time.perf_counter() - self.start)
+        return False
+
+# Profile of the file currently being processed, or None if profiling is
+# disabled. Each worker process has its own.
+current = None
+
+def begin(filename):
+    """Start profiling a file."""
+    global current
+    current = Profile(filename)
+
+def end():
+    """Stop profiling a file and return its profile as a dictionary."""
+    global current
+    profile = current
+    current = None
+    return profile.as_dict() if profile is not None else None
+
+def stage(name):
+    return Timer(name)
+
+def count(stage, **counters):
+    """Add counters into a stage of the current profile."""
+    if current is not None:
+        current.add(stage, **counters)
+
+def slowest(profiles):
+    """Given a list of file profiles, return the filename of the one that
+    took the longest.
+    """
+    return max(
+        profiles,
+        key=lambda x: x["stages"].get("file", {"time": 0.0})["time"],
+    )["filename"]
+
+def summarize(profiles):
+    """Given a list of profiles, print a table of each file's stages and a
+    total for each stage.
+    """
+    totals = {}
+    print(f"{'file':40} {'stage':12} {'time':>10}  counters")
+    for profile in profiles:
+        for name, counters in profile["stages"].items():
+            if name not in totals.keys():
+                totals[name] = {}
+            for key, value in counters.items():
+                totals[name][key] = totals[name].get(key, 0) + value
+            print_stage(profile["filename"], name, counters)
+    for name, counters in totals.items():
+        print_stage("(total)", name, counters)
+
+def print_stage(filename, name, counters):
+    others = ", ".join(f"{key}={value}" for key, value in counters.items() if key != "time")
+    print(f"{filename[-40:]:40} {name:12} {counters['time']:9.4f}s  {others}")
+
+def dump(filename, profiles):
+    """Write a list of profiles to a JSON file."""
+    with open(filename, "w") as f:
+        json.dump(profiles, f, indent=2)
+
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+
+import csv
+import hashlib
+import json
+import os
+import pathlib
+
+from parser.xml import VERSION
+from parser.row import Row
+
+DEFAULT_DIRECTORY = pathlib.Path(".cache")
+DEFAULT_SIZE = 64 * 1024 * 1024
+
+def hash_file(filename):
+    """Compute the SHA-256 digest of a file's content."""
+    digest = hashlib.sha256()
+    with open(filename, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+class Cache(object):
+    """Cache of parsed rows, keyed by the content of a PDF file and the
+    version of the parser.
+
+    Entries are CSV files in a directory, each with the warnings raised
+    while its rows were parsed in a JSON file alongside. A file's
+    modification time is bumped whenever it is read, so that the least
+    recently used entries can be evicted once the directory grows past its
+    size limit.
+    """
+    def __init__(self, directory=DEFAULT_DIRECTORY, max_size=DEFAULT_SIZE):
+        self.directory = pathlib.Path(directory)
+        self.max_size = max_size
+
+    def key(self, filename, digest=None):
+        """Given a PDF file, return the key for its entry. If the file's
+        content hash is already known, it is not computed again.
+        """
+        if digest is None:
+            digest = hash_file(filename)
+        return f"{VERSION}-{digest}"
+
+    def path(self, key):
+        return self.directory.joinpath(key + ".csv")
+
+    def records_path(self, path):
+        """Given the path of an entry, return the path of its warnings."""
+        return path.with_suffix(".warnings.json")
+
+    def get(self, key):
+        """Given a key, return the cached rows and warnings (as records, see
+        report.diagnostics), or None.
+        """
+        path = self.path(key)
+        try:
+            with open(self.records_path(path), "r") as f:
+                records = json.load(f)
+            with open(path, "r", newline="") as f:
+                rows = [Row.from_list(row) for row in csv.reader(f)]
+        except FileNotFoundError:
+            return None
+        os.utime(path)
+        return rows, records
+
+    def put(self, key, rows, records=()):
+        """Given a key, store rows and the warnings raised while parsing
+        them. Each file is written to a temporary file first so that
+        concurrent readers never see a partial entry. The warnings are
+        written first, so an entry's rows are never found without them.
+        """
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.path(key)
+
+        records_path = self.records_path(path)
+        tmp_path = records_path.with_name(f"{records_path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(list(records), f)
+        os.replace(tmp_path, records_path)
+
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, "w", newline="") as f:
+            writer = csv.writer(f)
+            for row in rows:
+                writer.writerow(row.as_list())
+        os.replace(tmp_path, path)
+
+    def remove(self, path):
+        """Given the path of an entry, remove it and its warnings."""
+        path.unlink()
+        self.records_path(path).unlink(missing_ok=True)
+
+    def entries(self):
+        if not self.directory.exists():
+            return []
+        return list(self.directory.glob("*.csv"))
+
+    def evict(self):
+        """Remove least recently used entries until the cache fits into its
+        size limit. Returns the number of entries removed.
+        """
+        entries = []
+        total = 0
+        for path in self.entries():
+            stat = path.stat()
+            size = stat.st_size
+            records_path = self.records_path(path)
+            if records_path.exists():
+                size += records_path.stat().st_size
+            entries.append((stat.st_mtime, size, path))
+            total += size
+
+        removed = 0
+        for _, size, path in sorted(entries):
+            if total <= self.max_size:
+                break
+            self.remove(path)
+            total -= size
+            removed += 1
+        return removed
+
+    def clear(self):
+        """Remove all entries. Returns the number of entries removed."""
+        removed = 0
+        for path in self.entries():
+            self.remove(path)
+            removed += 1
+        return removed
+
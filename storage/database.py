@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+
+import pathlib
+import sqlite3
+
+from parser.hours import Hours
+
+DEFAULT_DATABASE = pathlib.Path("analysis/timesheets.db")
+
+# Hours are stored as quarter hours and days as day ordinals, like the
+# parser holds them (see parser.hours and parser.dates).
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sheets (
+    id INTEGER PRIMARY KEY,
+    filename TEXT NOT NULL UNIQUE,
+    digest TEXT,
+    daterange TEXT,
+    total_timesheet INTEGER,
+    standard_hours INTEGER,
+    total_billable INTEGER,
+    percent_billability TEXT
+);
+
+CREATE TABLE IF NOT EXISTS entries (
+    id INTEGER PRIMARY KEY,
+    sheet_id INTEGER NOT NULL REFERENCES sheets (id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    project TEXT,
+    time_code TEXT,
+    label TEXT,
+    line_total INTEGER
+);
+
+CREATE TABLE IF NOT EXISTS hours (
+    entry_id INTEGER NOT NULL REFERENCES entries (id) ON DELETE CASCADE,
+    day INTEGER NOT NULL,
+    quarters INTEGER NOT NULL,
+    PRIMARY KEY (entry_id, day)
+);
+
+CREATE INDEX IF NOT EXISTS entries_sheet ON entries (sheet_id);
+CREATE INDEX IF NOT EXISTS entries_project ON entries (project);
+CREATE INDEX IF NOT EXISTS entries_time_code ON entries (time_code);
+CREATE INDEX IF NOT EXISTS hours_day ON hours (day);
+
+-- entries with the key that analysis.totals groups them by, and the sum of
+-- their hours (NULL if they have none)
+CREATE VIEW IF NOT EXISTS entry_totals AS
+SELECT
+    entries.id,
+    entries.sheet_id,
+    entries.label,
+    entries.project,
+    entries.time_code,
+    CASE
+        WHEN entries.time_code IN ('HOL', 'OTU', 'VAC', 'OPL') THEN entries.time_code
+        ELSE entries.project
+    END AS key,
+    (SELECT SUM(hours.quarters) FROM hours WHERE hours.entry_id = entries.id) AS quarters
+FROM entries;
+"""
+
+def parse_hours(value):
+    """Given a header value like '80.00', return quarter hours or None."""
+    if value is None:
+        return None
+    try:
+        return Hours.parse(value).quarters
+    except ValueError:
+        return None
+
+class Database(object):
+    """Store of parsed timesheets in an SQLite file: one row per sheet, per
+    time entry, and per day of hours.
+
+    Sheets are keyed by the resolved path of their file. Storing a sheet
+    again replaces it and all of its entries.
+    """
+    def __init__(self, filename=DEFAULT_DATABASE):
+        self.filename = pathlib.Path(filename)
+        self.filename.parent.mkdir(parents=True, exist_ok=True)
+        self.connection = sqlite3.connect(self.filename)
+        self.connection.execute("PRAGMA foreign_keys = ON")
+        self.connection.executescript(SCHEMA)
+
+    def store(self, filename, sheet, digest=None):
+        """Given a file and its parsed sheet, replace the file's sheet in one
+        transaction.
+        """
+        key = str(pathlib.Path(filename).resolve())
+        info = sheet.info
+        with self.connection:
+            self.connection.execute("DELETE FROM sheets WHERE filename = ?", (key, ))
+            cursor = self.connection.execute(
+                "INSERT INTO sheets (filename, digest, daterange, total_timesheet, "
+                "standard_hours, total_billable, percent_billability) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    key,
+                    digest,
+                    info.get("daterange"),
+                    parse_hours(info.get("total_timesheet")),
+                    parse_hours(info.get("standard_hours")),
+                    parse_hours(info.get("total_billable")),
+                    info.get("percent_billability"),
+                ),
+            )
+            sheet_id = cursor.lastrowid
+
+            hours = []
+            for position, entry in enumerate(sheet):
+                cursor = self.connection.execute(
+                    "INSERT INTO entries (sheet_id, position, project, time_code, "
+                    "label, line_total) VALUES (?, ?, ?, ?, ?, ?)",
+                    (
+                        sheet_id,
+                        position,
+                        entry.project,
+                        entry.time_code,
+                        entry.label,
+                        None if entry.line_total is None else entry.line_total.quarters,
+                    ),
+                )
+                entry_id = cursor.lastrowid
+                hours.extend(
+                    (entry_id, day, quarters, )
+                    for day, quarters in zip(entry.data.ordinals, entry.data.quarters)
+                )
+            self.connection.executemany(
+                "INSERT INTO hours (entry_id, day, quarters) VALUES (?, ?, ?)",
+                hours,
+            )
+
+    def query(self, sql, parameters=()):
+        """Run a query and return all of its rows."""
+        return self.connection.execute(sql, parameters).fetchall()
+
+    def close(self):
+        self.connection.close()
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+
+import json
+import os
+import pathlib
+
+from storage.cache import hash_file
+
+class Manifest(object):
+    """Record of processed files, mapping each path to the size,
+    modification time, and content hash seen on the last run.
+
+    A file whose size and modification time are unchanged is assumed to have
+    unchanged content, so it does not need to be hashed again.
+    """
+    def __init__(self, filename):
+        self.filename = pathlib.Path(filename)
+        self.files = {}
+        if self.filename.exists():
+            with open(self.filename, "r") as f:
+                self.files = json.load(f)
+
+    def digest(self, filename):
+        """Given a file, return its content hash. The hash is only computed
+        if the file is new or has changed.
+        """
+        stat = os.stat(filename)
+        key = str(pathlib.Path(filename).resolve())
+        record = self.files.get(key)
+        if (record is not None
+            and record["size"] == stat.st_size
+            and record["mtime"] == stat.st_mtime_ns):
+            return record["hash"]
+
+        digest = hash_file(filename)
+        self.files[key] = {
+            "size": stat.st_size,
+            "mtime": stat.st_mtime_ns,
+            "hash": digest,
+        }
+        return digest
+
+    def prune(self, filelist):
+        """Drop records of files that are not in a list. Returns the number
+        of records dropped.
+        """
+        keep = set(str(pathlib.Path(filename).resolve()) for filename in filelist)
+        dropped = [key for key in self.files if key not in keep]
+        for key in dropped:
+            del self.files[key]
+        return len(dropped)
+
+    def save(self):
+        self.filename.parent.mkdir(parents=True, exist_ok=True)
+        tmp_filename = self.filename.with_name(self.filename.name + ".tmp")
+        with open(tmp_filename, "w") as f:
+            json.dump(self.files, f, indent=2, sort_keys=True)
+        os.replace(tmp_filename, self.filename)
+